@@ -0,0 +1,64 @@
+# Per-command latency of db_handler with fresh connections per call (the old behaviour)
+# versus the pooled connection with pragma profiles
+# Usage: python -m benchmarks.bench_connection [iterations]
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from modules import db_handler
+from benchmarks.bench_ingest import make_postings
+
+
+# Old per-call implementations, kept here only as the baseline
+def fresh_get_all_settings():
+    with sqlite3.connect(db_handler.DB_PATH) as conn:
+        return conn.execute(f"SELECT * FROM {db_handler.settings_table_name}").fetchone()
+
+
+def fresh_get_internship_by_id(target_id):
+    with sqlite3.connect(db_handler.DB_PATH) as conn:
+        return conn.execute(f"SELECT * FROM {db_handler.tablename} WHERE id=?", (target_id,)).fetchone()
+
+
+def fresh_update_status(target_id, new_status):
+    with sqlite3.connect(db_handler.DB_PATH) as conn:
+        conn.execute(
+            f"UPDATE {db_handler.tablename} SET status=?, last_update=? WHERE id=?",
+            (new_status, datetime.now().date(), target_id)
+        )
+
+
+def measure(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def run(iterations: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_handler.DB_PATH = Path(tmp) / "bench.db"
+        db_handler.table_create()
+        for posting in make_postings(1000):
+            db_handler.add_internship(posting.company_name, posting.position, posting.location, posting.link, posting.date_posted)
+
+        commands = [
+            ("settings", lambda i: fresh_get_all_settings(), lambda i: db_handler.get_all_settings()),
+            ("list <id>", lambda i: fresh_get_internship_by_id(i % 1000 + 1), lambda i: db_handler.get_internship_by_id(i % 1000 + 1)),
+            ("update", lambda i: fresh_update_status(i % 1000 + 1, "read"), lambda i: db_handler.update_status(i % 1000 + 1, "read")),
+        ]
+
+        print(f"{'command':<12}{'fresh (us)':>12}{'pooled (us)':>14}")
+        for name, fresh, pooled in commands:
+            fresh_us = measure(fresh, iterations)
+            pooled_us = measure(pooled, iterations)
+            print(f"{name:<12}{fresh_us:>12.1f}{pooled_us:>14.1f}")
+
+        db_handler.close_connections()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,49 @@
+# Compares the per-row scrape_internship path with the bulk scrape_internships ingest
+# Usage: python -m benchmarks.bench_ingest [rows]
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from modules import db_handler
+from modules.dedup import fingerprint
+from modules.models import JobPosting
+
+
+def make_postings(amount: int, offset: int = 0) -> list[JobPosting]:
+    postings = []
+    for i in range(offset, offset + amount):
+        company_name, position, location = f"Company {i % 500}", f"Softwareentwickler {i}", "Kiel"
+        refnr = f"10000-{i:07d}-S"
+        postings.append(JobPosting(
+            None, company_name, position, location, f"https://www.arbeitsagentur.de/jobsuche/jobdetail/{refnr}",
+            "2026-10-01", refnr, fingerprint(company_name, position, location)
+        ))
+    return postings
+
+
+def run(rows: int) -> None:
+    postings = make_postings(rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_handler.DB_PATH = Path(tmp) / "per_row.db"
+        db_handler.table_create()
+        start = time.perf_counter()
+        for posting in postings:
+            db_handler.scrape_internship(*posting.insert_values()[:5])
+        per_row = time.perf_counter() - start
+
+        db_handler.DB_PATH = Path(tmp) / "bulk.db"
+        db_handler.table_create()
+        start = time.perf_counter()
+        inserted, duplicates = db_handler.scrape_internships(postings)
+        bulk = time.perf_counter() - start
+
+    print(f"rows:     {rows}")
+    print(f"per-row:  {per_row:.3f}s ({rows / per_row:,.0f} rows/sec)")
+    print(f"bulk:     {bulk:.3f}s ({rows / bulk:,.0f} rows/sec) -- {inserted} inserted, {duplicates} duplicates")
+    print(f"speedup:  {per_row / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
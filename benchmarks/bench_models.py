@@ -0,0 +1,94 @@
+# Per-record overhead of JobPosting (slotted dataclass) compared to the dicts and plain tuples
+# postings used to travel as, built from database rows and from API postings
+# Usage: python -m benchmarks.bench_models [records]
+import gc
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from modules import db_handler
+from modules.dedup import fingerprint
+from modules.models import JobPosting
+from benchmarks.corpus import make_jobs
+
+
+@dataclass
+class UnslottedPosting:
+    # JobPosting without __slots__, for reference
+    id: int | None
+    company_name: str | None
+    position: str | None
+    location: str | None
+    link: str
+    date_posted: str | None
+    refnr: str | None = None
+    fingerprint: str | None = None
+    plz: str | None = None
+    lat: float | None = None
+    lon: float | None = None
+
+
+def measure(build) -> tuple[float, int]:
+    # Seconds and traced bytes of the records built, the input (rows / API postings) is allocated beforehand
+    # so only the record containers are counted, the strings they point to are shared
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = build()
+    seconds = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return seconds, size
+
+
+def run(count: int) -> None:
+    columns = db_handler.table_columns(db_handler.temptablename) + ("refnr", "fingerprint", "plz", "lat", "lon")
+    postings = [JobPosting.from_api(job) for job in make_jobs(min(count, 10_000))]
+    # rows as returned by sqlite3 (temp_select + refnr, fingerprint, plz, lat, lon), repeated up to <count>
+    rows = [(i, p.company_name, p.position, p.location, p.link, p.date_posted, p.refnr, p.fingerprint,
+             p.plz, p.lat, p.lon)
+            for i, p in zip(range(count), (postings[i % len(postings)] for i in range(count)))]
+    jobs = make_jobs(min(count, 100_000))
+
+    from_row = {
+        "tuple": lambda: [(*row,) for row in rows],
+        "dict": lambda: [dict(zip(columns, row)) for row in rows],
+        "dataclass": lambda: [UnslottedPosting(*row) for row in rows],
+        "JobPosting": lambda: [JobPosting.from_row(row) for row in rows],
+    }
+    print(f"records: {count}")
+    print(f"{'from row':<14}{'records/sec':>14}{'bytes/record':>14}{'total (MB)':>12}")
+    for name, build in from_row.items():
+        seconds, size = measure(build)
+        print(f"{name:<14}{count / seconds:>14,.0f}{size / count:>14.0f}{size / 1024 / 1024:>12.1f}")
+
+    def parse_dict(job: dict) -> dict:
+        # JobPosting.from_api building a dict instead
+        ref_nr = job.get('refnr', None)
+        company_name = job.get('arbeitgeber', None)
+        position = job.get('titel', job.get('beruf', None))
+        workplace = job.get('arbeitsort', {})
+        location = workplace.get('ort', None)
+        coordinates = workplace.get('koordinaten') or {}
+        return {
+            "id": None, "company_name": company_name, "position": position, "location": location,
+            "link": job.get('externeUrl', f"https://www.arbeitsagentur.de/jobsuche/jobdetail/{ref_nr}"),
+            "date_posted": job.get('aktuelleVeroeffentlichungsdatum', None), "refnr": ref_nr,
+            "fingerprint": fingerprint(company_name, position, location), "plz": workplace.get('plz', None),
+            "lat": coordinates.get('lat', None), "lon": coordinates.get('lon', None)
+        }
+
+    print(f"\nfrom API postings ({len(jobs)} records, including the fingerprint)")
+    print(f"{'from api':<14}{'records/sec':>14}")
+    for name, parse in (("dict", parse_dict), ("JobPosting", JobPosting.from_api)):
+        start = time.perf_counter()
+        for job in jobs:
+            parse(job)
+        seconds = time.perf_counter() - start
+        print(f"{name:<14}{len(jobs) / seconds:>14,.0f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
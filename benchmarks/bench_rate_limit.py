@@ -0,0 +1,112 @@
+# Client-side rate limiting (modules/ratelimit.py) against the local API stub throttling like the real API would
+# (429 above a request rate / number of concurrent requests). Scrapes the same corpus without limiter and with
+# the adaptive one and checks that the limiter keeps the 429s down, loses no page and ramps up on a healthy API
+# Usage: python -m benchmarks.bench_rate_limit [postings]   (exits with 1 if a check fails)
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from modules import db_handler, metrics, scraper
+from modules.ratelimit import RateLimiter
+from benchmarks.corpus import make_jobs
+from benchmarks.stub_api import StubApi
+
+# What the stub allows: requests/sec and concurrent requests
+SERVER_RATE = 40.0
+SERVER_IN_FLIGHT = 3
+# Client limits of the adaptive run, deliberately above what the stub allows so AIMD has to find the limit
+CLIENT_LIMITS = {"rate": 100.0, "burst": 20, "concurrency": 8, "max_concurrency": 8, "cooldown": 0.5}
+# Most 429s per 100 requests the adaptive limiter may cause, well above the ~2% it gets on an idle machine
+# since a loaded one delays requests into bursts the stub throttles
+MAX_THROTTLED_SHARE = 0.25
+
+
+def scrape(jobs, limiter: RateLimiter, **stub_options) -> Dict:
+    db_handler.close_connections()
+    db_handler.DB_PATH = Path(tempfile.mkdtemp()) / "rate_limit.db"
+    db_handler.table_create()
+    metrics.reset()
+    scraper.limiters["jobs"] = limiter
+    with StubApi(jobs, latency=0.02, **stub_options) as stub:
+        start = time.perf_counter()
+        profiles = [(f"profile {i}", "benchmark", "Kiel", 25, len(jobs)) for i in range(4)]
+        try:
+            found, new, _ = scraper.scrape_profiles(profiles, url=stub.url, max_parallel=4)
+        except Exception as e:
+            # retries used up on a throttled page, the scrape is lost
+            found, new = None, None
+            print(f"scrape failed: {type(e).__name__}: {str(e)[:80]}", file=sys.stderr)
+        seconds = time.perf_counter() - start
+        return {
+            "seconds": seconds, "found": found, "new": new, "requests": stub.requests, "throttled": stub.throttled,
+            "peak_in_flight": stub.peak_in_flight, "retries": metrics.counter_total("http_retries_total"),
+            "limit": limiter.limit
+        }
+
+
+def throttled_share(run: Dict) -> float:
+    # 429s per request sent, comparable between runs that sent a different number of requests
+    return run["throttled"] / max(run["requests"], 1)
+
+
+def check_bucket() -> bool:
+    # 100 tokens at 200/sec with a burst of 20, taken from 4 threads at once. By any point in time at most
+    # burst + rate * elapsed tokens may have been handed out; a slow machine only hands out fewer, so counting
+    # the tokens taken (instead of timing the whole run) can't fail because of the machine's load
+    rate, burst = 200.0, 20
+    start = time.monotonic()
+    limiter = RateLimiter("bucket", rate=rate, burst=burst)
+    taken, taken_lock = [], threading.Lock()
+
+    def take(count: int) -> None:
+        for _ in range(count):
+            limiter.wait()
+            with taken_lock:
+                taken.append(time.monotonic() - start)
+
+    threads = [threading.Thread(target=take, args=(25,), daemon=True) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    # the timestamp is read after the token was handed out, so token n was taken no later than taken[n - 1]
+    over = [n for n, elapsed in enumerate(sorted(taken), 1) if n > burst + rate * elapsed + 1]
+    print(f"token bucket: {len(taken)} of 100 tokens, last one after {max(taken, default=0):.2f}s (at least "
+          f"{(100 - burst) / rate:.2f}s), {len(over)} taken above the rate")
+    return len(taken) == 100 and not over
+
+
+def main(postings: int) -> int:
+    metrics.enable()
+    jobs = make_jobs(postings)
+    throttling = {"rate_limit": SERVER_RATE, "max_in_flight": SERVER_IN_FLIGHT}
+    runs = {
+        "no limiter": scrape(jobs, RateLimiter("jobs", rate=None, concurrency=8, max_concurrency=8, min_concurrency=8), **throttling),
+        "adaptive": scrape(jobs, RateLimiter("jobs", **CLIENT_LIMITS), **throttling),
+        "healthy api": scrape(jobs, RateLimiter("jobs", rate=None, concurrency=1, max_concurrency=8)),
+    }
+    db_handler.close_connections()
+
+    print(f"{'run':<13}{'seconds':>9}{'found':>8}{'requests':>10}{'429s':>7}{'retries':>9}{'peak':>6}{'limit':>7}")
+    for name, run in runs.items():
+        print(f"{name:<13}{run['seconds']:>9.2f}{run['found'] if run['found'] is not None else 'failed':>8}{run['requests']:>10}{run['throttled']:>7}"
+              f"{run['retries']:>9g}{run['peak_in_flight']:>6}{run['limit']:>7.1f}")
+
+    adaptive, healthy = runs["adaptive"], runs["healthy api"]
+    checks = {
+        "token bucket keeps its rate": check_bucket(),
+        "adaptive run found every posting": adaptive["found"] is not None and adaptive["found"] == healthy["found"],
+        f"adaptive run got < {MAX_THROTTLED_SHARE:.0%} 429s": throttled_share(adaptive) <= MAX_THROTTLED_SHARE,
+        "fewer 429s than without limiter": throttled_share(adaptive) < throttled_share(runs["no limiter"]),
+        "concurrency ramps up on a healthy api": healthy["limit"] >= 4 and healthy["peak_in_flight"] > 1,
+    }
+    for check, passed in checks.items():
+        print(f"{'ok  ' if passed else 'FAIL'} {check}")
+    return 0 if all(checks.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000))
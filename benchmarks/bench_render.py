@@ -0,0 +1,79 @@
+# Rendering 'list .' for a large table: one Rich table for everything (the old behaviour)
+# versus streamed chunks and the TSV fast path used when stdout is not a terminal
+# Usage: python -m benchmarks.bench_render [rows] [--memory]
+import io
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from rich.console import Console
+
+from modules import db_handler
+from benchmarks.bench_ingest import make_postings
+import main
+
+
+class FirstWriteTimer(io.StringIO):
+    # Records when the first row reached the output
+    def __init__(self):
+        super().__init__()
+        self.first_write = None
+
+    def write(self, text):
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+        return super().write(text)
+
+
+def measure(render, trace_memory: bool) -> tuple[float, float, float]:
+    # tracemalloc slows Rich down a lot, so memory is only traced when asked for
+    out = FirstWriteTimer()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    render(out)
+    total = time.perf_counter() - start
+    peak = 0
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return (out.first_write or time.perf_counter()) - start, total, peak / 1024 / 1024
+
+
+def run(rows: int, trace_memory: bool = False) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_handler.DB_PATH = Path(tmp) / "bench.db"
+        db_handler.table_create()
+        db_handler.scrape_internships(make_postings(rows))
+        cli = main.InternshipCLI()
+
+        def render_single(out):
+            cli.console = Console(file=out, force_terminal=True, width=140)
+            internships, _ = db_handler.get_internships(db_handler.temptablename)
+            cli.console.print(cli._build_table(internships, title="All Scraped Jobs"))
+
+        def render_streamed(out):
+            cli.console = Console(file=out, force_terminal=True, width=140)
+            cli._stream_jobs(db_handler.temptablename, "All Scraped Jobs", "")
+
+        def render_tsv(out):
+            cli.console = Console(file=out, force_terminal=False)
+            with redirect_stdout(out):
+                cli._stream_jobs(db_handler.temptablename, "All Scraped Jobs", "")
+
+        print(f"rows: {rows}")
+        print(f"{'mode':<10}{'first row (s)':>15}{'total (s)':>12}{'peak (MB)':>12}")
+        for name, render in (("single", render_single), ("streamed", render_streamed), ("tsv", render_tsv)):
+            first_row, total, peak = measure(render, trace_memory)
+            peak_text = f"{peak:.1f}" if trace_memory else "-"
+            print(f"{name:<10}{first_row:>15.3f}{total:>12.3f}{peak_text:>12}")
+
+        db_handler.close_connections()
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--memory"]
+    run(int(args[0]) if args else 100_000, "--memory" in sys.argv)
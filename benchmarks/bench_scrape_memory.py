@@ -0,0 +1,74 @@
+# Peak memory (tracemalloc) of reading result pages: the whole body decoded with response.json()
+# (the old behaviour) versus streamed through the incremental parser, per page and for a whole scrape
+# Usage: python -m benchmarks.bench_scrape_memory [postings]
+import tempfile
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from modules import db_handler, scraper
+from modules.models import JobPosting
+from benchmarks.corpus import make_jobs
+from benchmarks.stub_api import StubApi
+
+
+def measure(run) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    run()
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return total, peak / 1024 / 1024
+
+
+def run(count: int) -> None:
+    sizes = sorted({min(size, count) for size in (100, 1000, 10_000, 100_000)})
+    # the pipeline is measured, not the client-side rate limit meant for the real API
+    for limiter in scraper.limiters.values():
+        limiter.rate = limiter.max_rate = None
+    with StubApi(make_jobs(count), page_sizes=[*sizes, scraper.PAGE_SIZE]) as stub:
+        measure_scrape(count, sizes, stub.url)
+
+
+def measure_scrape(count: int, sizes: list[int], url: str) -> None:
+    print(f"postings: {count}")
+    print(f"{'page size':<12}{'mode':<10}{'seconds':>10}{'peak (MB)':>12}")
+    for size in sizes:
+        def full():
+            data = scraper.client.get_json(url, params=scraper._search_params("x", "y", 25, 1, size))
+            for job in data.get("stellenangebote", []):
+                JobPosting.from_api(job)
+
+        def streamed():
+            for job in scraper.iter_page_jobs("x", "y", 25, 1, size, url):
+                JobPosting.from_api(job)
+
+        for name, read in (("full", full), ("streamed", streamed)):
+            seconds, peak = measure(read)
+            print(f"{size:<12}{name:<10}{seconds:>10.3f}{peak:>12.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def collected():
+            # everything collected first, then written in one transaction
+            new_postings, _, _, _ = scraper.collect_jobs("x", "y", 25, count, url)
+            db_handler.scrape_internships(new_postings)
+
+        def pipeline():
+            scraper.get_jobs_raw("x", "y", 25, count, url)
+
+        print(f"\nwhole scrape ({count} postings, {scraper.PAGE_SIZE} per page)")
+        print(f"{'mode':<12}{'seconds':>10}{'peak (MB)':>12}")
+        for name, scrape in (("collected", collected), ("pipeline", pipeline)):
+            # a fresh database per mode, cleared postings stay known (archive) and would not be scraped again
+            db_handler.DB_PATH = Path(tmp) / f"bench_{name}.db"
+            db_handler.table_create()
+            seconds, peak = measure(scrape)
+            print(f"{name:<12}{seconds:>10.3f}{peak:>12.1f}")
+
+        db_handler.close_connections()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,95 @@
+# Full-text search (FTS5, 'search <query>') versus a LIKE '%...%' scan over the scraped table
+# Usage: python -m benchmarks.bench_search [rows]
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from modules import db_handler
+from modules.dedup import fingerprint
+from modules.models import JobPosting
+
+TITLES = ["Softwareentwickler", "Python Developer", "Data Engineer", "Fachinformatiker", "DevOps Engineer",
+          "Werkstudent IT", "Java Entwickler", "Frontend Developer", "Systemadministrator", "Praktikum Informatik"]
+EXTRAS = ["(m/w/d)", "remote", "Teilzeit", "Vollzeit", "Junior", "Senior", "Backend", "Cloud"]
+CITIES = ["Kiel", "Hamburg", "Berlin", "München", "Köln", "Lübeck", "Frankfurt am Main", "Bremen"]
+QUERIES = ["python", "remote", "kiel", "devops cloud", "company 4711"]
+
+
+def make_corpus(rows: int) -> list[JobPosting]:
+    rng = random.Random(42)
+    postings = []
+    for i in range(rows):
+        company_name = f"Company {rng.randrange(10_000)}"
+        position = f"{rng.choice(TITLES)} {rng.choice(EXTRAS)} {rng.choice(EXTRAS)}"
+        location = rng.choice(CITIES)
+        refnr = f"10000-{i:07d}-S"
+        postings.append(JobPosting(
+            None, company_name, position, location, f"https://www.arbeitsagentur.de/jobsuche/jobdetail/{refnr}",
+            "2026-10-01", refnr, fingerprint(company_name, position, location)
+        ))
+    return postings
+
+
+def like_where(query: str) -> tuple[str, list]:
+    # What 'search' would have to do without the index: every word has to appear in one of the columns
+    conditions, params = [], []
+    for term in query.split():
+        conditions.append("(" + " OR ".join(f"{column} LIKE ?" for column in db_handler.search_columns) + ")")
+        params += [f"%{term}%"] * len(db_handler.search_columns)
+    return " AND ".join(conditions), params
+
+
+def like_search(query: str, limit: int = 50) -> list:
+    # first <limit> matches, unranked (a LIKE scan has no relevance order)
+    where, params = like_where(query)
+    with db_handler.get_connection() as conn:
+        return conn.execute(f"SELECT id FROM {db_handler.temptablename} WHERE {where} LIMIT ?", (*params, limit)).fetchall()
+
+
+def like_count(query: str) -> int:
+    where, params = like_where(query)
+    with db_handler.get_connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {db_handler.temptablename} WHERE {where}", params).fetchone()[0]
+
+
+def fts_count(query: str) -> int:
+    with db_handler.get_connection() as conn:
+        fts_table = f"{db_handler.temptablename}_fts"
+        return conn.execute(
+            f"SELECT COUNT(*) FROM {fts_table} WHERE {fts_table} MATCH ?", (db_handler._fts_query(query),)
+        ).fetchone()[0]
+
+
+def measure(func, query: str, repeat: int = 5) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(query)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(rows: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_handler.DB_PATH = Path(tmp) / "bench.db"
+        db_handler.table_create()
+        corpus = make_corpus(rows)
+        start = time.perf_counter()
+        db_handler.scrape_internships(corpus)
+        print(f"rows: {rows} (ingest incl. FTS triggers {time.perf_counter() - start:.1f}s)")
+
+        # top 50: ranked FTS5 results vs. the first 50 unranked LIKE hits
+        # all: every match counted, i.e. what a LIKE scan costs when it can not stop early
+        print(f"{'query':<16}{'matches':>9}{'fts5 top50':>12}{'like top50':>12}{'fts5 all':>10}{'like all':>10}  (ms)")
+        for query in QUERIES:
+            fts_ms = measure(lambda q: db_handler.search_internships(q), query)
+            like_ms = measure(like_search, query)
+            fts_all_ms = measure(fts_count, query)
+            like_all_ms = measure(like_count, query)
+            print(f"{query:<16}{fts_count(query):>9}{fts_ms:>12.2f}{like_ms:>12.2f}{fts_all_ms:>10.2f}{like_all_ms:>10.2f}")
+
+        db_handler.close_connections()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,81 @@
+# Startup time of main.py: import time (python -X importtime) and a short command end to end, both in fresh processes
+# Usage: python -m benchmarks.bench_startup [runs]   (exits with 1 if the import is over STARTUP_BUDGET_MS)
+import compileall
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+from modules import db_handler
+
+# Target for 'import main' (median over the runs), the shell and headless runs import nothing else before their command
+STARTUP_BUDGET_MS = 60
+# Modules that should only be imported by the commands using them
+LAZY_MODULES = ("requests", "rich", "modules.scraper")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(code: str) -> Dict[str, int]:
+    # Cumulative microseconds per top level import of <code>, as reported by python -X importtime
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                            cwd=db_handler.BASE_DIR, check=True)
+    times = {}
+    for match in IMPORTTIME_LINE.finditer(result.stderr):
+        module, indent = match.group(4), len(match.group(3))
+        if module == "site" and indent == 1:
+            # interpreter startup (and .pth hooks of the environment), not caused by <code>
+            times.clear()
+            continue
+        times[module] = int(match.group(2))
+    return times
+
+
+def run_startup(db_path: Path) -> float:
+    # Wall time of a whole process doing what the shell does before its first prompt: import main, prepare the schema
+    code = (f"from modules import db_handler; db_handler.DB_PATH = {str(db_path)!r}; "
+            "import main; db_handler.table_create(); db_handler.close_connections()")
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], capture_output=True, cwd=db_handler.BASE_DIR,
+                   env={**os.environ, "JOBSCRAPER_METRICS": ""})
+    return time.perf_counter() - start
+
+
+def main(runs: int) -> int:
+    # measured with compiled bytecode like a normal install, even if PYTHONDONTWRITEBYTECODE is set
+    compileall.compile_file(db_handler.BASE_DIR / "main.py", quiet=1)
+    compileall.compile_dir(db_handler.BASE_DIR / "modules", quiet=1)
+    samples = [import_times("import main") for _ in range(runs)]
+    totals = [sample["main"] / 1000 for sample in samples]
+    median = statistics.median(totals)
+
+    print(f"import main: median {median:.1f}ms, min {min(totals):.1f}ms, max {max(totals):.1f}ms ({runs} runs)")
+    slowest = sorted(samples[-1].items(), key=lambda item: item[1], reverse=True)[:10]
+    for module, micros in slowest:
+        print(f"  {module:<40}{micros / 1000:>8.1f}ms")
+
+    loaded = [module for module in LAZY_MODULES if module in samples[-1]]
+    if loaded:
+        print(f"imported eagerly: {', '.join(loaded)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "startup.db"
+        # first run creates the schema, the others find it current
+        first = run_startup(db_path)
+        with_schema = [run_startup(db_path) for _ in range(runs)]
+    print(f"startup: {first * 1000:.1f}ms with a new database, median {statistics.median(with_schema) * 1000:.1f}ms afterwards")
+
+    if median > STARTUP_BUDGET_MS or loaded:
+        print(f"over budget ({STARTUP_BUDGET_MS}ms, no eager {'/'.join(LAZY_MODULES)})")
+        return 1
+    print(f"within budget ({STARTUP_BUDGET_MS}ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
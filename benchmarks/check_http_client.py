@@ -0,0 +1,120 @@
+# Retries, timeouts and conditional requests of modules/http_client.py against the local API stub injecting
+# faults on purpose (error responses, stalled responses, dropped connections) and answering 304 for unchanged pages
+# Usage: python -m benchmarks.check_http_client   (exits with 1 if a check fails)
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+import requests
+
+from modules import db_handler, metrics, scraper
+from modules.http_client import HttpClient
+from benchmarks.corpus import make_jobs
+from benchmarks.stub_api import StubApi
+
+# Short backoff and read timeout so the checks run in a few seconds
+CLIENT_OPTIONS = {"max_retries": 3, "backoff_base": 0.05, "backoff_max": 2.0, "timeout": (1, 0.3)}
+
+
+def fetch(stub: StubApi, **options) -> Dict:
+    # One get_json of the first result page with a fresh client, how it went and what the stub saw
+    metrics.reset()
+    client = HttpClient(**{**CLIENT_OPTIONS, **options})
+    start = time.perf_counter()
+    try:
+        data = client.get_json(stub.url, params={"page": 1, "size": 10})
+        error = None
+    except requests.RequestException as e:
+        data, error = None, type(e).__name__
+    finally:
+        client.close()
+    return {
+        "seconds": time.perf_counter() - start, "jobs": len(data["stellenangebote"]) if data else 0, "error": error,
+        "requests": stub.requests, "faults": stub.faults, "retries": metrics.counter_total("http_retries_total")
+    }
+
+
+def run(jobs, faults=(), **stub_options) -> Dict:
+    with StubApi(jobs, faults=faults, **stub_options) as stub:
+        return fetch(stub)
+
+
+def check_backoff() -> bool:
+    # full jitter: every delay lies between 0 and the exponential limit, capped at backoff_max
+    client = HttpClient(backoff_base=0.5, backoff_max=3.0)
+    delays = {attempt: [client._backoff(attempt, None) for _ in range(1000)] for attempt in range(5)}
+    client.close()
+    return all(0 <= delay <= min(3.0, 0.5 * 2 ** attempt) for attempt, values in delays.items() for delay in values)
+
+
+def check_conditional(jobs) -> Dict:
+    # The same page twice: the second request is conditional and answered from the cache.
+    # Then a whole scrape twice, the result pages of the second one are replayed from the scraper's page cache
+    metrics.reset()
+    with StubApi(jobs, etag=True) as stub:
+        client = HttpClient(**CLIENT_OPTIONS)
+        first = client.get_json(stub.url, params={"page": 1, "size": 10})
+        second = client.get_json(stub.url, params={"page": 1, "size": 10})
+        client.close()
+        json_304s = stub.not_modified
+
+        db_handler.close_connections()
+        db_handler.DB_PATH = Path(tempfile.mkdtemp()) / "check_http_client.db"
+        db_handler.table_create()
+        scraper._page_cache.clear()
+        profiles = [("check", "x", "Kiel", 25, len(jobs))]
+        found, new, stats = scraper.scrape_profiles(profiles, url=stub.url, full=True)
+        pages_304 = stub.not_modified
+        found_again, new_again, _ = scraper.scrape_profiles(profiles, url=stub.url, full=True)
+        db_handler.close_connections()
+        return {
+            "same data": first == second, "json 304s": json_304s, "pages": stats["pages"],
+            "found": (found, new, found_again, new_again), "page 304s": stub.not_modified - pages_304,
+            "replayed": metrics.counter_total("scrape_pages_not_modified_total"),
+        }
+
+
+def main() -> int:
+    metrics.enable()
+    for limiter in scraper.limiters.values():
+        limiter.rate = limiter.max_rate = None
+    jobs = make_jobs(300)
+
+    runs = {
+        "503 twice": run(jobs, faults=(503, 503), retry_after=0),
+        "retry-after 1s": run(jobs, faults=(429,), retry_after=1),
+        "stalled": run(jobs, faults=("stall",), stall=0.6),
+        "connection reset": run(jobs, faults=("reset",)),
+        "500 every time": run(jobs, faults=(500,) * 10, retry_after=0),
+        "404": run(jobs, faults=(404,)),
+    }
+    print(f"{'run':<18}{'seconds':>9}{'jobs':>6}{'requests':>10}{'faults':>8}{'retries':>9}  error")
+    for name, result in runs.items():
+        print(f"{name:<18}{result['seconds']:>9.2f}{result['jobs']:>6}{result['requests']:>10}{result['faults']:>8}"
+              f"{result['retries']:>9g}  {result['error'] or '-'}")
+    conditional = check_conditional(jobs)
+    print(f"conditional: {conditional}")
+
+    retries = CLIENT_OPTIONS["max_retries"]
+    checks = {
+        "retried past two 503s": runs["503 twice"]["jobs"] == 10 and runs["503 twice"]["requests"] == 3,
+        "waited for Retry-After": runs["retry-after 1s"]["jobs"] == 10 and runs["retry-after 1s"]["seconds"] >= 1.0,
+        "retried a timed out request": runs["stalled"]["jobs"] == 10 and runs["stalled"]["retries"] == 1,
+        "retried a dropped connection": runs["connection reset"]["jobs"] == 10 and runs["connection reset"]["retries"] == 1,
+        f"gave up after {retries} retries": runs["500 every time"]["error"] == "HTTPError"
+                                             and runs["500 every time"]["requests"] == retries + 1,
+        "no retry on 404": runs["404"]["error"] == "HTTPError" and runs["404"]["requests"] == 1,
+        "backoff within its jittered limit": check_backoff(),
+        "unchanged response served from cache": conditional["same data"] and conditional["json 304s"] == 1,
+        "unchanged result pages replayed": conditional["page 304s"] == conditional["pages"] == conditional["replayed"]
+                                           and conditional["found"] == (len(jobs), len(jobs), len(jobs), 0),
+    }
+    for check, passed in checks.items():
+        print(f"{'ok  ' if passed else 'FAIL'} {check}")
+    return 0 if all(checks.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
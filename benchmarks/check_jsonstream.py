@@ -0,0 +1,79 @@
+# Chunk boundaries of modules/jsonstream.py: result pages (and documents full of numbers, escapes and multi-byte
+# characters) are split at every byte position and at random positions, each split has to parse like json.loads
+# Usage: python -m benchmarks.check_jsonstream [random splits]   (exits with 1 if a check fails)
+import json
+import random
+import sys
+from typing import Dict, List
+
+from modules.jsonstream import JsonArrayStream
+from benchmarks.corpus import make_jobs, make_page
+
+KEY = "stellenangebote"
+# Values that are cut in the middle most easily: numbers with fractions / exponents, escapes, non-ASCII text
+TRICKY = [3.25, -0.5, 1e5, 2.5E-3, -7e+2, 0, 10, 123456789012, True, False, None, "Köln \"Süd\" \\ é中\U0001f600", [], {}]
+DOCUMENTS: Dict[str, bytes] = {
+    "result page": json.dumps(make_page(make_jobs(5), 1, 5), ensure_ascii=False).encode(),
+    "numbers": json.dumps({"maxErgebnisse": 3.25, KEY: TRICKY, "page": 1e3}, ensure_ascii=False).encode(),
+    "nested": json.dumps({KEY: [{"koordinaten": {"lat": 54.32, "lon": -10.13e1}, "list": [1.5, [2e-1]]}],
+                          "facetten": {"x": [0.1, 2]}}).encode(),
+    "empty": json.dumps({KEY: []}).encode(),
+    "compact": b'{"a":3.25,"stellenangebote":[1.5,2e10,-3.0E-2],"b":-0.75}',
+}
+
+
+def parse(chunks: List[bytes]) -> tuple:
+    stream = JsonArrayStream(chunks, KEY)
+    items = list(stream)
+    return items, stream.meta
+
+
+def expected(document: bytes) -> tuple:
+    data = json.loads(document)
+    return data.get(KEY, []), {name: value for name, value in data.items() if name != KEY}
+
+
+def splits(document: bytes, rng: random.Random, count: int) -> List[List[bytes]]:
+    # every single cut, every chunk size from 1 to 8 bytes and <count> random multi-cuts
+    result = [[document[:cut], document[cut:]] for cut in range(len(document) + 1)]
+    result += [[document[i:i + size] for i in range(0, len(document), size)] for size in range(1, 9)]
+    for _ in range(count):
+        cuts = sorted(rng.sample(range(1, len(document)), min(len(document) - 1, rng.randint(1, 20))))
+        result.append([document[start:end] for start, end in zip([0, *cuts], [*cuts, len(document)])])
+    return result
+
+
+def main(count: int) -> int:
+    rng = random.Random(7)
+    checks = {}
+    for name, document in DOCUMENTS.items():
+        want = expected(document)
+        failures = []
+        cases = splits(document, rng, count)
+        for chunks in cases:
+            try:
+                got = parse(chunks)
+            except ValueError as e:
+                got = e
+            if got != want:
+                failures.append((chunks, got))
+        print(f"{name:<12}{len(document):>7} bytes{len(cases):>7} splits{len(failures):>6} failed")
+        if failures:
+            chunks, got = failures[0]
+            print(f"  first failure: {[chunk[:30] for chunk in chunks][:4]} -> {str(got)[:120]}")
+        checks[f"{name} parses the same at every chunk boundary"] = not failures
+
+    # a cut number at the real end of the input is still an error, not a silently truncated value
+    try:
+        parse([b'{"a":3.'])
+        checks["truncated document is rejected"] = False
+    except ValueError:
+        checks["truncated document is rejected"] = True
+
+    for check, passed in checks.items():
+        print(f"{'ok  ' if passed else 'FAIL'} {check}")
+    return 0 if all(checks.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
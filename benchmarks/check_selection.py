@@ -0,0 +1,78 @@
+# Selections of modules/selection.py ('move 4-60,72', 'delete where company~foo and status=read') run against an
+# in-memory table: id lists and ranges, LIKE escaping of '%', '_' and '\' and filters the target table does not have
+# Usage: python -m benchmarks.check_selection   (exits with 1 if a check fails)
+import sqlite3
+import sys
+from typing import List
+
+from modules import db_handler
+from modules.selection import SelectionError, parse_selection
+
+MAIN_COLUMNS = db_handler.table_columns(db_handler.tablename)
+SCRAPED_COLUMNS = db_handler.table_columns(db_handler.temptablename)
+COMPANIES = ["Foo GmbH", "100% Foo", "Foo_Bar", "FooXBar", "C:\\Foo", "Bar AG"]
+
+
+def make_table() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE jobs({', '.join(MAIN_COLUMNS)})")
+    # ids 1-100, company cycles through COMPANIES, date through 2025-01-01..28, odd ids are 'read'
+    rows = [(i, COMPANIES[i % len(COMPANIES)], "Werkstudent", "Kiel", f"https://example.org/{i}",
+             f"2025-01-{i % 28 + 1:02d}", "read" if i % 2 else "applied", "2025-02-01") for i in range(1, 101)]
+    conn.executemany(f"INSERT INTO jobs VALUES({', '.join('?' * len(MAIN_COLUMNS))})", rows)
+    return conn
+
+
+def select(conn: sqlite3.Connection, args: List[str], columns=MAIN_COLUMNS) -> List[int]:
+    where, params = parse_selection(args, columns)
+    return [row[0] for row in conn.execute(f"SELECT id FROM jobs WHERE {where} ORDER BY id", params)]
+
+
+def rejected(args: List[str], columns=MAIN_COLUMNS) -> bool:
+    try:
+        parse_selection(args, columns)
+    except SelectionError:
+        return True
+    return False
+
+
+def companies(conn: sqlite3.Connection, ids: List[int]) -> set:
+    return {conn.execute("SELECT company_name FROM jobs WHERE id = ?", [i]).fetchone()[0] for i in ids}
+
+
+def main() -> int:
+    conn = make_table()
+    checks = {
+        "single id": select(conn, ["7"]) == [7],
+        "id range": select(conn, ["4-8"]) == [4, 5, 6, 7, 8],
+        "ids and ranges": select(conn, ["4-6,72,90-91,1"]) == [1, 4, 5, 6, 72, 90, 91],
+        "id range and single ids share one query": parse_selection(["4-6,9,11"], MAIN_COLUMNS)
+                                                   == ("id BETWEEN ? AND ? OR id IN (?, ?)", [4, 6, 9, 11]),
+        "ids outside the table match nothing": select(conn, ["500-600"]) == [],
+        "reversed range rejected": rejected(["8-4"]),
+        "malformed id list rejected": rejected(["4-"]) and rejected(["4,,5"]) and rejected(["4-6-8"]),
+        "'~' matches case-insensitively": companies(conn, select(conn, ["where", "company~foo"]))
+                                          == {"Foo GmbH", "100% Foo", "Foo_Bar", "FooXBar", "C:\\Foo"},
+        "'%' matched literally": companies(conn, select(conn, ["where", "company~0%"])) == {"100% Foo"},
+        "'_' matched literally": companies(conn, select(conn, ["where", "company~o_b"])) == {"Foo_Bar"},
+        "'\\' matched literally": companies(conn, select(conn, ["where", "company~:\\f"])) == {"C:\\Foo"},
+        "filters joined with 'and'": select(conn, ["where", "company~bar", "and", "status=read"])
+                                     == [i for i in range(1, 101) if i % 6 in (3, 5)],
+        "quoted value with spaces": select(conn, ["where", "company=Bar AG"]) == list(range(5, 101, 6)),
+        "id compared as a number": select(conn, ["where", "id>=98"]) == [98, 99, 100],
+        "date compared": select(conn, ["where", "date<2025-01-03", "and", "id<=40"]) == [1, 28, 29],
+        "unknown filter rejected": rejected(["where", "salary>5"]),
+        "column missing in the target table rejected": rejected(["where", "status=read"], SCRAPED_COLUMNS)
+                                                       and not rejected(["where", "status=read"]),
+        "raw column names rejected": rejected(["where", "company_name=x"]) and rejected(["where", "1=1"]),
+        "injection stays a parameter": select(conn, ["where", "company=x' OR '1'='1"]) == [],
+        "empty selection rejected": rejected([]) and rejected(["where"]) and rejected(["where", "and"]),
+        "selection without 'where' rejected": rejected(["company~foo"]),
+    }
+    for check, passed in checks.items():
+        print(f"{'ok  ' if passed else 'FAIL'} {check}")
+    return 0 if all(checks.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
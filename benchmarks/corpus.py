@@ -0,0 +1,62 @@
+# Synthetic jobsuche corpus: postings shaped like the 'stellenangebote' of the arbeitsagentur API
+import random
+from datetime import date, timedelta
+from typing import Dict, List
+
+CITIES = ["Kiel", "Hamburg", "Berlin", "München", "Köln", "Frankfurt am Main", "Stuttgart", "Leipzig", "Lübeck", "Bremen"]
+POSITIONS = ["Praktikum Softwareentwicklung", "Werkstudent Data Science", "Praktikant/in IT-Administration",
+             "Praktikum Web-Entwicklung (Python)", "Pflichtpraktikum Informatik", "Praktikum Cloud Engineering"]
+
+
+def make_job(i: int, newest: date = date(2026, 10, 1)) -> Dict:
+    # Posting number <i>, roughly the shape (and size) of a real one. Newer postings get lower numbers,
+    # the API sorts by date (sortierung=datum), so page 1 holds the newest postings
+    refnr = f"10000-{i:010d}-S"
+    city = CITIES[i % len(CITIES)]
+    return {
+        "beruf": "Praktikant/in Softwareentwicklung",
+        "titel": f"{POSITIONS[i % len(POSITIONS)]} (m/w/d) {i}",
+        "refnr": refnr,
+        "arbeitsort": {
+            "plz": f"{10000 + i % 89999}", "ort": city, "region": "Deutschland",
+            "strasse": f"Musterstraße {i % 200}", "land": "Deutschland",
+            "koordinaten": {"lat": 47.5 + (i % 550) / 100, "lon": 6.0 + (i % 900) / 100}
+        },
+        "arbeitgeber": f"Muster GmbH {i % 5000}",
+        "aktuelleVeroeffentlichungsdatum": (newest - timedelta(days=i // 500)).isoformat(),
+        "modifikationsTimestamp": "2026-10-01T08:15:30.123",
+        "eintrittsdatum": "2026-11-01",
+        "kundennummerHash": f"{i:064x}"
+    }
+
+
+def make_jobs(count: int, duplicate_rate: float = 0.0, seed: int = 0) -> List[Dict]:
+    # <count> postings, about <duplicate_rate> of them repost an earlier posting: half of them
+    # under a new refnr (same content), half with the same refnr (listed twice by the API)
+    rng = random.Random(seed)
+    jobs: List[Dict] = []
+    for i in range(count):
+        if jobs and rng.random() < duplicate_rate:
+            original = jobs[rng.randrange(len(jobs))]
+            job = dict(original)
+            if rng.random() < 0.5:
+                job["refnr"] = f"20000-{i:010d}-S"
+            jobs.append(job)
+        else:
+            jobs.append(make_job(i))
+    return jobs
+
+
+def make_page(jobs: List[Dict], page: int, size: int) -> Dict:
+    # Result page like GET /pc/v4/jobs?page=<page>&size=<size> returns it
+    return {
+        "stellenangebote": jobs[(page - 1) * size:page * size],
+        "maxErgebnisse": str(len(jobs)),
+        "page": str(page),
+        "size": str(size)
+    }
+
+
+def make_pages(pages: int, page_size: int = 100, duplicate_rate: float = 0.0, seed: int = 0) -> List[Dict]:
+    jobs = make_jobs(pages * page_size, duplicate_rate, seed)
+    return [make_page(jobs, page, page_size) for page in range(1, pages + 1)]
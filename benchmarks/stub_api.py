@@ -0,0 +1,189 @@
+# Local stand-in for the arbeitsagentur jobsuche endpoints (jobs + jobdetails) with injectable latency, throttling
+# and faults (error responses, stalled responses, dropped connections)
+# Usage: python -m benchmarks.stub_api [postings] [latency seconds] [port]
+import base64
+import json
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Sequence
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.corpus import make_jobs, make_page
+
+
+class StubApi:
+    # Serves <jobs> page by page on /pc/v4/jobs and a small detail document per refnr on /pc/v4/jobdetails/<base64 refnr>.
+    # Every request waits <latency> seconds first. Pages of <page_sizes> are encoded up front, so the server
+    # thread allocates (almost) nothing while a benchmark traces memory.
+    # Like a throttling API it answers 429 (Retry-After: <retry_after>) to requests above <rate_limit> per second
+    # (token bucket, bursts of one second) or above <max_in_flight> concurrent requests, counted in .throttled
+    # <faults> are answered to the first attempts at every url (path + query), one per attempt, then it responds normally:
+    # a status code (e.g. 503, sent with Retry-After: <retry_after>), "stall" (waits <stall> seconds before
+    # responding, past the client's read timeout) or "reset" (closes the connection without a response), counted in .faults
+    # <etag> sends an ETag with every response and answers 304 to a matching If-None-Match, counted in .not_modified
+    def __init__(self, jobs: List[Dict], latency: float = 0.0, page_sizes: Iterable[int] = (), port: int = 0,
+                 rate_limit: float | None = None, max_in_flight: int | None = None, retry_after: int = 1,
+                 faults: Sequence[int | str] = (), stall: float = 1.0, etag: bool = False):
+        self.jobs = jobs
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.faults_per_url = list(faults)
+        self.stall = stall
+        self.etag = etag
+        self.requests = 0
+        self.throttled = 0
+        self.faults = 0
+        self.not_modified = 0
+        # attempts per url, to pick the fault of the next one
+        self.attempts: Dict[str, int] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._tokens = rate_limit or 0.0
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+        self._bodies: Dict[tuple[int, int], bytes] = {}
+        for size in page_sizes:
+            for page in range(1, len(jobs) // size + 2):
+                self._bodies[page, size] = self._encode(make_page(jobs, page, size))
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub._handle(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/pc/v4/jobs"
+
+    @property
+    def detail_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/pc/v4/jobdetails/{{refnr}}"
+
+    @staticmethod
+    def _encode(document: Dict) -> bytes:
+        return json.dumps(document, ensure_ascii=False).encode()
+
+    def _admit(self) -> bool:
+        # Counts the request in, False if it is throttled
+        with self._lock:
+            self.requests += 1
+            if self.rate_limit is not None:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+                self._refilled = now
+            if ((self.rate_limit is not None and self._tokens < 1)
+                    or (self.max_in_flight is not None and self.in_flight >= self.max_in_flight)):
+                self.throttled += 1
+                return False
+            if self.rate_limit is not None:
+                self._tokens -= 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return True
+
+    def _handle(self, request: BaseHTTPRequestHandler) -> None:
+        if not self._admit():
+            request.send_response(429)
+            request.send_header("Retry-After", str(self.retry_after))
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+        try:
+            self._respond(request)
+        except (BrokenPipeError, ConnectionResetError):
+            # the client gave up waiting (stall fault)
+            pass
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _fault(self, request: BaseHTTPRequestHandler) -> int | str | None:
+        with self._lock:
+            attempt = self.attempts.get(request.path, 0)
+            self.attempts[request.path] = attempt + 1
+            if attempt >= len(self.faults_per_url):
+                return None
+            self.faults += 1
+            return self.faults_per_url[attempt]
+
+    def _respond(self, request: BaseHTTPRequestHandler) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+        fault = self._fault(request)
+        if fault == "reset":
+            request.close_connection = True
+            return
+        if fault == "stall":
+            time.sleep(self.stall)
+        elif fault is not None:
+            request.send_response(int(fault))
+            request.send_header("Retry-After", str(self.retry_after))
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+
+        path = urlparse(request.path)
+        if path.path.startswith("/pc/v4/jobdetails/"):
+            refnr = base64.b64decode(path.path.rsplit("/", 1)[-1]).decode()
+            body = self._encode({"refnr": refnr, "stellenangebotsTitel": f"Praktikum {refnr}",
+                                 "stellenangebotsBeschreibung": "Beschreibung " * 50})
+        elif path.path == "/pc/v4/jobs":
+            query = parse_qs(path.query)
+            page, size = int(query.get("page", ["1"])[0]), int(query.get("size", ["25"])[0])
+            body = self._bodies.get((page, size)) or self._encode(make_page(self.jobs, page, size))
+        else:
+            request.send_error(404)
+            return
+
+        etag = None
+        if self.etag:
+            etag = f'"{zlib.crc32(body):08x}"'
+            if request.headers.get("If-None-Match") == etag:
+                with self._lock:
+                    self.not_modified += 1
+                request.send_response(304)
+                request.send_header("ETag", etag)
+                request.send_header("Content-Length", "0")
+                request.end_headers()
+                return
+
+        request.send_response(200)
+        request.send_header("Content-Type", "application/json")
+        if etag is not None:
+            request.send_header("ETag", etag)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def __enter__(self) -> "StubApi":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    with StubApi(make_jobs(int(args[0]) if args else 10_000), float(args[1]) if len(args) > 1 else 0.0,
+                 port=int(args[2]) if len(args) > 2 else 8080) as stub:
+        print(f"serving {len(stub.jobs)} postings on {stub.url} (Ctrl+C to stop)")
+        try:
+            stub._thread.join()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,153 @@
+# Scripted scenarios (scrape, list ., list main, move, clear) against the local API stub at several table sizes.
+# Results are written as JSON so runs of different commits can be compared:
+#   python -m benchmarks.suite --output before.json
+#   python -m benchmarks.suite --output after.json --compare before.json
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from rich.console import Console
+
+from modules import db_handler, scraper
+from benchmarks.corpus import make_jobs
+from benchmarks.stub_api import StubApi
+import main
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+
+def _commit() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=db_handler.BASE_DIR, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _timed(action: Callable[[], Dict | None]) -> tuple[float, Dict]:
+    start = time.perf_counter()
+    extra = action() or {}
+    return time.perf_counter() - start, extra
+
+
+def run_scenarios(rows: int, latency: float, duplicate_rate: float, seed: int, devnull) -> List[Dict]:
+    # Runs every scenario once on a fresh database, in the order a user would: scrape, look, move, look, clear
+    results = []
+    cli = main.InternshipCLI()
+    terminal = Console(file=devnull, force_terminal=True, width=140)
+    pipe = Console(file=devnull, force_terminal=False)
+
+    def command(line: str, console: Console = terminal) -> Callable[[], None]:
+        def action():
+            cli.console = console
+            with redirect_stdout(devnull):
+                cli._process_command(line)
+        return action
+
+    # the pipeline is measured, not the client-side rate limit meant for the real API
+    for limiter in scraper.limiters.values():
+        limiter.rate = limiter.max_rate = None
+
+    with StubApi(make_jobs(rows, duplicate_rate, seed), latency=latency) as stub:
+        def scrape():
+            profiles = [("default", "benchmark", "Kiel", 25, rows)]
+            found, new, stats = scraper.scrape_profiles(profiles, url=stub.url)
+            return {"found": found, "new": new, "pages": stats["pages"], "requests": stub.requests}
+
+        stored = rows
+        scenarios = [
+            ("scrape", scrape),
+            ("list .", command("list .")),
+            ("list . (pipe)", command("list .", pipe)),
+            ("move", command(f"move 1-{rows}")),
+            ("list main", command("list main")),
+            ("clear", command("clear")),
+        ]
+        for name, action in scenarios:
+            seconds, extra = _timed(action)
+            if name == "scrape":
+                stored = extra["new"]
+            results.append({
+                "scenario": name,
+                "rows": rows,
+                "stored": stored,
+                "seconds": round(seconds, 4),
+                "rows_per_sec": round(stored / seconds, 1) if seconds else None,
+                **extra
+            })
+    return results
+
+
+def run(sizes: List[int], latency: float, duplicate_rate: float, seed: int) -> Dict:
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "latency": latency,
+            "duplicate_rate": duplicate_rate,
+            "seed": seed
+        },
+        "results": []
+    }
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        for rows in sizes:
+            db_handler.close_connections()
+            db_handler.DB_PATH = Path(tmp) / f"bench_{rows}.db"
+            db_handler.table_create()
+            for result in run_scenarios(rows, latency, duplicate_rate, seed, devnull):
+                report["results"].append(result)
+                print(f"{result['scenario']:<15}{rows:>9}{result['seconds']:>10.3f}s", file=sys.stderr)
+        db_handler.close_connections()
+    return report
+
+
+def compare(base: Dict, report: Dict) -> None:
+    # Seconds of every (scenario, rows) next to the base run, > 1.00x means slower than the base
+    base_seconds = {(r["scenario"], r["rows"]): r["seconds"] for r in base["results"]}
+    print(f"\ncompared to {base['meta'].get('commit') or 'base'} ({base['meta'].get('created')})", file=sys.stderr)
+    print(f"{'scenario':<15}{'rows':>9}{'base':>10}{'now':>10}{'ratio':>9}", file=sys.stderr)
+    for result in report["results"]:
+        before = base_seconds.get((result["scenario"], result["rows"]))
+        if before is None:
+            continue
+        ratio = result["seconds"] / before if before else float("inf")
+        print(f"{result['scenario']:<15}{result['rows']:>9}{before:>10.3f}{result['seconds']:>10.3f}{ratio:>8.2f}x", file=sys.stderr)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="Benchmark scenarios against the local API stub")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma separated table sizes (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds the stub waits per request (default: %(default)s)")
+    parser.add_argument("--duplicates", type=float, default=0.05,
+                        help="share of postings that repost an earlier one (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--compare", help="JSON report of an earlier run to compare against")
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    report = run([int(size) for size in args.sizes.split(",")], args.latency, args.duplicates, args.seed)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), report)
@@ -1,17 +1,27 @@
 # Library import
+import argparse
+import itertools
+import operator
+import shlex
 import sys
-from typing import List, Dict
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Dict
 # Modules import
 from modules import db_handler
-from modules import scraper
+from modules import metrics
+from modules import selection
+from modules.models import JobPosting, TrackedJob
 
-# CLI (command line interface // terminal) tables + colors
-from rich import box
-from rich.console import Console
-from rich.table import Table
+# The scraper (requests) and rich (CLI tables + colors) are imported by the commands that use them,
+# so the shell starts and headless runs work without paying for both imports up front
+if TYPE_CHECKING:
+    from rich.table import Table
 
 class InternshipCLI:
     def __init__(self):
+        from rich.console import Console
         self.console = Console()
         # Map command strings to methods
         self.commands: Dict[str, callable] = {
@@ -21,7 +31,16 @@ class InternshipCLI:
             "update": self.handle_update,
             "scrape": self.handle_scrape,
             "settings": self.handle_settings,
+            "profile": self.handle_profile,
+            "search": self.handle_search,
+            "near": self.handle_near,
+            "details": self.handle_details,
+            "stats": self.handle_stats,
+            "report": self.handle_report,
             "clear": self.handle_clear,
+            "expire": self.handle_expire,
+            "export": self.handle_export,
+            "import": self.handle_import,
             "delete": self.handle_delete,
             "quit": self.handle_quit
         }
@@ -33,6 +52,19 @@ class InternshipCLI:
             "read": "yellow",
             "fetched": "white"
         }
+        # Order of the statuses in 'report'
+        self.funnel: tuple = ("fetched", "read", "applied", "interview", "offer", "rejected")
+        # Weeks shown by 'report' without <weeks>
+        self.report_weeks = 8
+        # Rows per page for 'list <./main> <page>' and the keyset cursors of already visited pages
+        self.page_size = 50
+        self.page_cursors: Dict[tuple, Dict[int, tuple | None]] = {}
+        # Maximum number of results shown by 'search'
+        self.search_limit = 50
+        # Rows per rendered chunk when a whole table is listed
+        self.stream_chunk_size = 500
+        self.column_widths: Dict[str, int] = {"ID": 6, "Link": 4, "Date": 10, "Status": 9, "Last update": 11}
+        self.column_ratios: Dict[str, int] = {"Company": 3, "Position": 4, "Location": 2}
     
     def start(self):
         self.console.print()
@@ -57,12 +89,28 @@ class InternshipCLI:
                 self.console.print(f"An unexpected error occured: {e}", style="red")
 
     def _process_command(self, user_input: str):
-        parts = user_input.split()
+        # quotes group words ('profile add dev "Frankfurt am Main" ..'), unbalanced quotes fall back to plain split.
+        # Backslashes are no escape character, so Windows paths ('export . C:\tmp\jobs.csv') stay as typed
+        try:
+            lexer = shlex.shlex(user_input, posix=True)
+            lexer.whitespace_split = True
+            lexer.commenters = ""
+            lexer.escape = ""
+            parts = list(lexer)
+        except ValueError:
+            parts = user_input.split()
+        if not parts:
+            return
         command_name = parts[0].lower()
         args = parts[1:]
 
         if command_name in self.commands:
+            # Any other command may change the tables, so cached page cursors are dropped
+            if command_name != "list":
+                self.page_cursors.clear()
+            started = metrics.start()
             self.commands[command_name](args)
+            metrics.observe_since("cli_command_seconds", started, command=command_name)
         else:
             self.console.print(f"Unknown command: '{command_name}'. Type [white]'help'[/white] for options.", style="yellow")
 
@@ -70,6 +118,7 @@ class InternshipCLI:
     def handle_quit(self, args: List[str] = None):
         # Exits the program
         self.console.print("Exiting program..", style="red bold u")
+        db_handler.close_connections()
         sys.exit()
 
     
@@ -78,14 +127,35 @@ class InternshipCLI:
 
         help_text = [
             ("[white]'list .'[/white]", "[yellow]lists all interships scraped[yellow]"),
-            ("[white]'move <id>'[/white]", "[yellow]moves and saves intership with <id> in main database[yellow]"),
-            ("[white]'clear'[/white]", "[yellow]clears the whole temporary database[yellow]"),
+            ("[white]'move <id(s)>'[/white]", "[yellow]moves and saves interships with <id(s)> (e.g. 4-60,72) in main database[yellow]"),
+            ("[white]'move where <filter>'[/white]", "[yellow]moves all scraped interships matching the filter (e.g. company~foo and date>=2025-01-01)[yellow]"),
+            ("[white]'clear'[/white]", "[yellow]clears the whole temporary database (the postings are kept in the archive)[yellow]"),
+            ("[white]'expire <days>'[/white]", f"[yellow]archives scraped internships no scrape has seen for <days> days (default {db_handler.EXPIRE_AFTER_DAYS}, also runs after every full scrape)[yellow]"),
             ("[white]'list main'[/white]", "[yellow]lists all interships saved in main database[yellow]"),
-            ("[white]'list <id>'[/white]", "[yellow]gets information about specific internship from main database[yellow]"),
-            ("[white]'update <id> <new_status>'[/white]", "[yellow]updates current status of specific internship[yellow]"),
+            ("[white]'list <./main> pager'[/white]", "[yellow]lists all internships inside a pager[yellow]"),
+            ("[white]'list <./main> <page> <limit>'[/white]", "[yellow]lists only one page of internships (default limit is 50)[yellow]"),
+            ("[white]'list archive'[/white]", "[yellow]lists scraped internships that expired or were cleared (also takes <page> <limit>)[yellow]"),
+            ("[white]'list <id>'[/white]", "[yellow]gets information about specific internship (and its status history) from main database[yellow]"),
+            ("[white]'update <id(s)> <new_status>'[/white]", "[yellow]updates current status of specific internships[yellow]"),
+            ("[white]'update status=<new_status> where <filter>'[/white]", "[yellow]updates the status of all saved internships matching the filter[yellow]"),
+            ("[white]'delete <id(s)>'[/white] / [white]'delete where <filter>'[/white]", "[yellow]deletes internships from main database[yellow]"),
             ("[white]'scrape'[/white]", "[yellow]gets newly posted internships[yellow]"),
+            ("[white]'scrape details'[/white]", "[yellow]also fetches the full posting of every new internship[yellow]"),
+            ("[white]'scrape full'[/white]", "[yellow]reads every result page, not only the new ones, and archives jobs no longer listed (a scrape does this by itself once a week)[yellow]"),
+            ("[white]'details <id>'[/white] / [white]'details main <id>'[/white]", "[yellow]shows the full posting of a scraped / saved internship[yellow]"),
             ("[white]'settings .'[/white]", "[yellow]shows the current search filters when scraping[yellow]"),
             ("[white]'settings <search/region/radius/amount> <new_value>'[/white]", "[yellow]changes specific setting[yellow]"),
+            ("[white]'search <query>'[/white]", "[yellow]searches company, position and location of all stored jobs[yellow]"),
+            ("[white]'near <place/plz/lat,lon> <km>'[/white]", "[yellow]lists scraped internships within <km> of a place, nearest first (no new scrape needed)[yellow]"),
+            ("[white]'profile .'[/white]", "[yellow]lists all saved search profiles ('scrape' runs all of them)[yellow]"),
+            ("[white]'profile add <name> <search> <region> <radius> <amount>'[/white]", "[yellow]saves a search profile (use quotes for values with spaces)[yellow]"),
+            ("[white]'profile delete <name>'[/white]", "[yellow]deletes a search profile[yellow]"),
+            ("[white]'report'[/white] / [white]'report <weeks>'[/white]", "[yellow]application funnel: jobs per status, per week and average days in each status[yellow]"),
+            ("[white]'stats'[/white] / [white]'stats <on/off/reset>'[/white]", "[yellow]shows timings and counters of scraping, database and rendering[yellow]"),
+            ("[white]'export <./main> <file>'[/white]", "[yellow]writes all scraped / saved internships to a .csv, .jsonl or .parquet file[yellow]"),
+            ("[white]'export all <directory> <csv/jsonl/parquet>'[/white]", "[yellow]exports both tables at once (one file per table)[yellow]"),
+            ("[white]'import <./main> <file>'[/white] / [white]'import all <directory>'[/white]", "[yellow]loads exported internships back, already stored links are skipped[yellow]"),
+            ("[white]'stats dump <file>'[/white]", "[yellow]writes the stats to a file (JSON for *.json, Prometheus text otherwise)[yellow]"),
             ("[white]'quit'[/white]", "[yellow]Exits tbe program[yellow]"),
         ]
 
@@ -99,38 +169,28 @@ class InternshipCLI:
             return
         
         target = args[0]
-        if target == ".":
-            internships, error = db_handler.get_internships(db_handler.temptablename)
-            # print(internships)
-            if error is not None:
-                self.console.print(f"Error: {error}")
-                return
-
-            if not internships or internships == [None]:
-                table = self._build_table([], title="All Scraped Jobs")
-                self.console.print(table)
-                self.console.print("No job was found. Try [white]'scrape'[/white] first!", style="yellow")
-                return
-            
-            table = self._build_table(internships, title="All Scraped Jobs")
-            self.console.print(table)
-
-        elif target == "main":
-            # Fetch data
-            internships, error = db_handler.get_internships(db_handler.tablename)
-
-            if error is not None:
-                self.console.print(f"Error: {error}")
+        if target in (".", "main", "archive"):
+            page, limit, pager = None, self.page_size, False
+            if len(args) > 1 and args[1] == "pager":
+                pager = True
+                args = args[:1]
+            try:
+                if len(args) > 1:
+                    page = int(args[1])
+                if len(args) > 2:
+                    limit = int(args[2])
+            except ValueError:
+                page = 0
+            if page is not None and (page < 1 or limit < 1):
+                self.console.print("Usage: [white]'list <./main/archive> <page> <limit>'[/white] (page and limit have to be positive numbers)", style="red")
                 return
 
-            if not internships:
-                table = self._build_table([], title="All Saved Jobs")
-                self.console.print(table)
-                self.console.print("No job was found. Try [white]'move <id>'[/white] first!", style="yellow")
-                return
-            
-            table = self._build_table(internships, title="All Saved Jobs")
-            self.console.print(table)
+            if target == ".":
+                self._list_jobs(db_handler.temptablename, "All Scraped Jobs", "No job was found. Try [white]'scrape'[/white] first!", page, limit, pager)
+            elif target == "archive":
+                self._list_jobs(db_handler.archive_table_name, "Archived Scraped Jobs", "The archive is empty.", page, limit, pager)
+            else:
+                self._list_jobs(db_handler.tablename, "All Saved Jobs", "No job was found. Try [white]'move <id>'[/white] first!", page, limit, pager)
 
         else:
             internship, error = db_handler.get_internship_by_id(target)
@@ -148,56 +208,134 @@ class InternshipCLI:
         
             self.console.print(table)
 
+            history, error = db_handler.get_status_history(target)
+            if error is None and history:
+                self.console.print("Status history:", style="bold u bright_yellow")
+                for from_status, to_status, changed_at in history:
+                    style = self.statuscolor.get(to_status, "white")
+                    self.console.print(f"{changed_at}  {from_status or 'saved'} -> [{style}]{to_status}[/{style}]")
+
     
-    def _build_table(self, data: List[tuple], title: str) -> Table:
-        table = Table(title=title, box=box.ROUNDED, show_header=True, show_lines=True, header_style="bold cyan")
+    def _list_jobs(self, table_name: str, title: str, empty_hint: str, page: int | None, limit: int, pager: bool = False) -> None:
+        # Without a page the whole table gets streamed, otherwise only the rows of that page are fetched
+        if page is None:
+            self._stream_jobs(table_name, title, empty_hint, pager)
+            return
+        else:
+            cursors = self.page_cursors.setdefault((table_name, limit), {1: None})
+            if page not in cursors:
+                cursors[page] = db_handler.get_page_cursor(table_name, page, limit)
+            if page > 1 and cursors[page] is None:
+                internships, next_cursor, error = [], None, None
+            else:
+                internships, next_cursor, error = db_handler.get_internships_page(table_name, limit, cursors[page])
+                if next_cursor is not None:
+                    cursors[page + 1] = next_cursor
+            title = f"{title} (page {page})"
+
+        if error is not None:
+            self.console.print(f"Error: {error}")
+            return
+
+        if not internships:
+            table = self._build_table([], title=title)
+            self.console.print(table)
+            if page > 1:
+                self.console.print(f"Page {page} is empty.", style="yellow")
+            else:
+                self.console.print(empty_hint, style="yellow")
+            return
+
+        started = metrics.start()
+        table = self._build_table(internships, title=title)
+        self.console.print(table)
+        metrics.observe_since("render_seconds", started)
 
+    def _stream_jobs(self, table_name: str, title: str, empty_hint: str, pager: bool = False) -> None:
+        # Renders the table chunk by chunk as it is read from the database,
+        # plain TSV is written instead if stdout is not a terminal (pipes, files)
+        chunks = db_handler.iter_internships(table_name, self.stream_chunk_size)
+        first_chunk = next(chunks, None)
+
+        if not self.console.is_terminal:
+            self._write_tsv(table_name, first_chunk or [], chunks)
+            return
+
+        if first_chunk is None:
+            self.console.print(self._build_table([], title=title))
+            self.console.print(empty_hint, style="yellow")
+            return
+
+        if pager:
+            with self.console.pager(styles=True):
+                self._print_chunks(first_chunk, chunks, title)
+        else:
+            self._print_chunks(first_chunk, chunks, title)
+
+    def _print_chunks(self, first_chunk: List[JobPosting | TrackedJob], chunks, title: str) -> None:
+        # only the rendering is timed, reading the next chunk is covered by db_call_seconds
+        started = metrics.start()
+        self.console.print(self._build_table(first_chunk, title=title, fixed_width=True))
+        metrics.observe_since("render_seconds", started)
+        for rows in chunks:
+            started = metrics.start()
+            self.console.print(self._build_table(rows, title=None, show_header=False, fixed_width=True))
+            metrics.observe_since("render_seconds", started)
+
+    def _write_tsv(self, table_name: str, first_chunk: List[JobPosting | TrackedJob], chunks) -> None:
+        columns = db_handler.table_columns(table_name)
+        values = operator.attrgetter(*columns)
+        out = sys.stdout
+        out.write("\t".join(columns) + "\n")
+
+        for rows in itertools.chain([first_chunk], chunks):
+            out.write("".join(
+                "\t".join("" if value is None else str(value).replace("\t", " ").replace("\n", " ") for value in values(row)) + "\n"
+                for row in rows
+            ))
+        out.flush()
+
+    def _build_table(self, data: List[JobPosting | TrackedJob], title: str | None, show_header: bool = True, fixed_width: bool = False) -> "Table":
+        from rich import box
+        from rich.table import Table
+        table = Table(title=title, box=box.ROUNDED, show_header=show_header, show_lines=True, header_style="bold cyan")
+        if fixed_width:
+            # Streamed chunks are separate tables, fixed widths/ratios keep their columns aligned
+            table.expand = True
+            for column in self._build_columns(table, data):
+                column.width = self.column_widths.get(column.header)
+                column.ratio = self.column_ratios.get(column.header)
+        else:
+            self._build_columns(table, data)
+
+        for job in data:
+            cells = [
+                str(job.id),
+                job.company_name,
+                job.position,
+                job.location,
+                f"[link={job.link}]LINK[/link]",
+                job.date_posted
+            ]
+            if isinstance(job, TrackedJob):
+                # statuses outside the map (e.g. from an imported file) are shown in the default color
+                status_style = self.statuscolor.get(job.status, "white")
+                cells += [f"[{status_style}]{job.status}[/{status_style}]", job.last_update]
+            table.add_row(*cells)
+        return table
+
+    def _build_columns(self, table: "Table", data: List[JobPosting | TrackedJob]) -> list:
         table.add_column("ID", justify="center", style="dim white")
         table.add_column("Company", style="bold white")
         table.add_column("Position")
         table.add_column("Location", justify="center")
         table.add_column("Link", justify="center", style="blue u")
         table.add_column("Date", justify="center")
-        # print(data)
-        if not data:
-            return table
-        elif len(data[0]) == 8:
+        if data and isinstance(data[0], TrackedJob):
             table.add_column("Status", justify="right")
             table.add_column("Last update", justify="center")
-            for row in data:
-                id, company_name, position, location, link, date_posted, status, last_update = row
-                # print(id)
-                status_style = self.statuscolor[status]
-
-                table.add_row(
-                    str(id),
-                    company_name,
-                    position,
-                    location,
-                    f"[link={link}]LINK[/link]",
-                    date_posted,
-                    f"[{status_style}]{status}[/{status_style}]",
-                    last_update
-                )
-            
-            return table
-        elif len(data[0]) == 6:
-            for row in data:
-                # print("b")
-                id, company_name, position, location, link, date_posted = row
-                # print("c")
-                table.add_row(
-                    str(id),
-                    company_name,
-                    position,
-                    location,
-                    f"[link={link}]LINK[/link]",
-                    date_posted
-                )
-            return table
-        else:
-            return table
-    
+        return table.columns
+
     def _get_status_color(self, status):
         status = status.lower()
 
@@ -206,39 +344,71 @@ class InternshipCLI:
         
 
     def handle_update(self, args: List[str]):
-        if len(args) != 2:
-            self.console.print("Usage: [white]'update <id> <offer / rejected / interview / applied / fetched>'[/white]", style="red")
+        usage = (
+            "Usage: [white]'update <id(s)> <offer / rejected / interview / applied / read / fetched>'[/white] "
+            "or [white]'update status=<status> where <filter>'[/white]"
+        )
+        # 'update 4-60,72 read' or 'update status=read where company~foo' / 'update status=read 4-60'
+        if len(args) >= 2 and args[0].lower().startswith("status="):
+            new_status, selected = args[0][len("status="):].lower(), args[1:]
+        elif len(args) == 2:
+            new_status, selected = args[1].lower(), args[:1]
+        else:
+            self.console.print(usage, style="red")
             return
 
-        internship_id, new_status = args[0], args[1]
+        if new_status not in self.statuscolor:
+            self.console.print(usage, style="red")
+            return
 
-        if args[1].lower() not in self.statuscolor:
-            self.console.print("Usage: [white]'update <id> <offer / rejected / interview / applied / fetched>'[/white]", style="red")
+        selection = self._parse_selection(selected, db_handler.tablename, usage)
+        if selection is None:
             return
 
-        
-        
-        maxID = db_handler.update_check()
-        # print(maxID)
-        if int(internship_id) <= int(maxID):
-            db_handler.update_status(internship_id, new_status)
-            self.console.print(f"Updating ID {internship_id} to status '{new_status}'..", style="bold green")
+        updated = db_handler.update_statuses(new_status, *selection)
+        if updated:
+            self.console.print(f"Updated {updated} internship(s) ({' '.join(selected)}) to status '{new_status}'..", style="bold green")
         else:
-            self.console.print(f"Error: Internship with ID {internship_id} not found.", style="bold red")
+            self.console.print(f"Error: No internship matched {' '.join(selected)}.", style="bold red")
 
         return
+
+    def _parse_selection(self, args: List[str], table_name: str, usage: str) -> tuple | None:
+        # id list / range ('4-60,72') or filter expression ('where company~foo and date>=2025-01-01')
+        try:
+            return selection.parse_selection(args, db_handler.table_columns(table_name))
+        except selection.SelectionError as e:
+            from rich.markup import escape
+            self.console.print(f"Error: {escape(str(e))}", style="red")
+            self.console.print(usage, style="red")
+            return None
     
     def handle_scrape(self, args: List[str]):
+        from modules import scraper
         self.console.print("Starting scraper..", style="cyan")
 
-        search, ort, umkreis, search_amount = db_handler.get_all_settings()[0]
+        profiles = db_handler.get_search_profiles()
+        details = "details" in args
 
-        found_jobs, new_jobs = scraper.get_jobs_raw(search, ort, umkreis, search_amount)
+        found_jobs, new_jobs, stats = scraper.scrape_profiles(profiles, details=details, full="full" in args)
 
         if found_jobs > 0:
             self.console.print(f"Found {found_jobs} jobs -- {new_jobs} were added to the database ", style="green")
+            if details:
+                self.console.print(f"Fetched the details of {stats['details']} new jobs", style="green")
+            self.console.print(
+                f"{stats['profiles']} profile(s), {stats['overlaps']} overlapping, {stats['pages']} pages in {stats['seconds']:.2f}s "
+                f"({stats['pages_per_sec']:.1f} pages/sec, {stats['jobs_per_sec']:.1f} jobs/sec)",
+                style="dim"
+            )
         else:
             self.console.print(f"No jobs were found -- try again later or try to update search settings by using [white]'settings .'[/white]..", style="red")
+        if stats["seen_again"] or stats["expired"]:
+            self.console.print(
+                f"{stats['seen_again']} stored job(s) seen again, {stats['expired']} job(s) unseen for "
+                f"{db_handler.EXPIRE_AFTER_DAYS} days moved to the archive",
+                style="dim"
+            )
 
 
         # self.console.print(f"Successfully fetched {success} internships.", style="bold green")
@@ -277,26 +447,307 @@ class InternshipCLI:
                 self.console.print(f"Something went wrong, try again", style="red b")
             return
     
+    def handle_search(self, args: List[str]) -> None:
+        if not args:
+            self.console.print("Usage: [white]'search <query>'[/white] (e.g. [white]'search python kiel'[/white])", style="red")
+            return
+
+        query = " ".join(args)
+        results, error = db_handler.search_internships(query, self.search_limit)
+        if error is not None:
+            self.console.print(f"Error: {error}")
+            return
+
+        from rich import box
+        from rich.table import Table
+        table = Table(title=f"Search results for '{query}'", box=box.ROUNDED, show_header=True, show_lines=True, header_style="bold cyan")
+        table.add_column("ID", justify="center", style="dim white")
+        table.add_column("Table", justify="center")
+        table.add_column("Company", style="bold white")
+        table.add_column("Position")
+        table.add_column("Location", justify="center")
+        table.add_column("Link", justify="center", style="blue u")
+        table.add_column("Date", justify="center")
+        for source, job in results:
+            table.add_row(str(job.id), source, job.company_name, job.position, job.location, f"[link={job.link}]LINK[/link]", job.date_posted)
+        self.console.print(table)
+
+        if not results:
+            self.console.print("No job matched your search.", style="yellow")
+        elif len(results) == self.search_limit:
+            self.console.print(f"Showing the best {self.search_limit} matches only.", style="yellow")
+
+    def handle_near(self, args: List[str]) -> None:
+        usage = "Usage: [white]'near <place/plz/lat,lon> <km>'[/white] (e.g. [white]'near Kiel 25'[/white] or [white]'near 24103 10'[/white])"
+        if len(args) < 2:
+            self.console.print(usage, style="red")
+            return
+        place = " ".join(args[:-1])
+        try:
+            km = float(args[-1])
+        except ValueError:
+            km = 0
+        if km <= 0:
+            self.console.print(usage, style="red")
+            return
+
+        try:
+            lat, lon = (float(value) for value in place.split(","))
+        except ValueError:
+            # place name or postal code, located by the coordinates of the stored postings there
+            center = db_handler.get_place_coordinates(place)
+            if center is None:
+                self.console.print(f"No stored posting with coordinates in '{place}', scrape it first or use [white]<lat>,<lon>[/white].", style="red")
+                return
+            lat, lon = center
+
+        results, error = db_handler.get_internships_near(lat, lon, km, self.search_limit)
+        if error is not None:
+            self.console.print(f"Error: {error}")
+            return
+
+        from rich import box
+        from rich.table import Table
+        table = Table(title=f"Scraped jobs within {km:g} km of {place}", box=box.ROUNDED, show_header=True, show_lines=True, header_style="bold cyan")
+        table.add_column("ID", justify="center", style="dim white")
+        table.add_column("Company", style="bold white")
+        table.add_column("Position")
+        table.add_column("Location", justify="center")
+        table.add_column("km", justify="right")
+        table.add_column("Link", justify="center", style="blue u")
+        table.add_column("Date", justify="center")
+        for distance, job in results:
+            table.add_row(str(job.id), job.company_name, job.position, job.location, f"{distance:.1f}", f"[link={job.link}]LINK[/link]", job.date_posted)
+        self.console.print(table)
+
+        if not results:
+            self.console.print("No scraped job in this radius.", style="yellow")
+        elif len(results) == self.search_limit:
+            self.console.print(f"Showing the nearest {self.search_limit} jobs only.", style="yellow")
+
+    def handle_details(self, args: List[str]) -> None:
+        usage = "Usage: [white]'details <id>'[/white] (scraped jobs) or [white]'details main <id>'[/white] (saved jobs)"
+        if len(args) == 1:
+            table_name, target = db_handler.temptablename, args[0]
+        elif len(args) == 2 and args[0] == "main":
+            table_name, target = db_handler.tablename, args[1]
+        else:
+            self.console.print(usage, style="red")
+            return
+
+        ref_nr = db_handler.get_posting_refnr(table_name, target)
+        if ref_nr is None:
+            self.console.print(f"No posting details available for ID {target} (unknown id or external posting).", style="red")
+            return
+
+        from modules import scraper
+        from rich.markup import escape
+        detail = scraper.fetch_detail(ref_nr, scraper.get_detail_cache())
+
+        title = detail.get("stellenangebotsTitel") or detail.get("titel")
+        employer = detail.get("firma") or detail.get("arbeitgeber")
+        description = detail.get("stellenangebotsBeschreibung") or detail.get("stellenbeschreibung")
+        if not (title or employer or description):
+            # unknown layout, show everything
+            self.console.print_json(data=detail)
+            return
+
+        self.console.print(f"[bold white]{escape(str(title or ''))}[/bold white] [yellow]({escape(str(employer or '-'))})[/yellow]")
+        self.console.print(f"[dim]refnr {ref_nr}[/dim]")
+        self.console.print()
+        self.console.print(escape(str(description or "No description available.")))
+
+    def handle_profile(self, args: List[str]) -> None:
+        usage = "Usage: [white]'profile .'[/white], [white]'profile add <name> <search> <region> <radius> <amount>'[/white] or [white]'profile delete <name>'[/white]"
+        if not args:
+            self.console.print(usage, style="red")
+            return
+
+        if args[0] == ".":
+            profiles, error = db_handler.get_profiles()
+            if error is not None:
+                self.console.print(f"Error: {error}")
+                return
+            if not profiles:
+                self.console.print("No profiles saved, 'scrape' uses the [white]'settings .'[/white] search.", style="yellow")
+                return
+
+            from rich import box
+            from rich.table import Table
+            table = Table(title="Search Profiles", box=box.ROUNDED, show_header=True, header_style="bold cyan")
+            for column in ("Name", "Search", "Region", "Radius", "Amount", "Matched jobs"):
+                table.add_column(column)
+            for row in profiles:
+                table.add_row(*(str(value) for value in row))
+            self.console.print(table)
+
+        elif args[0] == "add" and len(args) == 6:
+            name, search, ort, umkreis, search_amount = args[1:]
+            if not umkreis.isdigit() or not search_amount.isdigit():
+                self.console.print("Radius and amount have to be numbers.", style="red")
+                return
+            if db_handler.add_profile(name, search, ort, int(umkreis), int(search_amount)):
+                self.console.print(f"Saved profile [white]{name}[/white]", style="green b")
+            else:
+                self.console.print(f"Profile [white]{name}[/white] could not be saved (does it already exist?)", style="red b")
+
+        elif args[0] == "delete" and len(args) == 2:
+            if db_handler.delete_profile(args[1]):
+                self.console.print(f"Deleted profile [white]{args[1]}[/white]", style="green b")
+            else:
+                self.console.print(f"Profile [white]{args[1]}[/white] was not found", style="red b")
+
+        else:
+            self.console.print(usage, style="red")
+
+    def handle_stats(self, args: List[str]) -> None:
+        usage = "Usage: [white]'stats'[/white], [white]'stats <on/off/reset>'[/white] or [white]'stats dump <file>'[/white]"
+        if args in (["on"], ["off"]):
+            metrics.enable(args[0] == "on")
+            self.console.print(f"Metrics collection is [white]{args[0]}[/white].", style="green")
+            return
+        if args == ["reset"]:
+            metrics.reset()
+            self.console.print("Metrics were reset.", style="green")
+            return
+        if len(args) == 2 and args[0] == "dump":
+            try:
+                metrics.dump(args[1])
+            except OSError as e:
+                self.console.print(f"Error: {e}", style="red")
+                return
+            self.console.print(f"Wrote metrics to [white]{args[1]}[/white]", style="green")
+            return
+        if args:
+            self.console.print(usage, style="red")
+            return
+
+        histograms, counters = metrics.histograms(), metrics.counters()
+        if not histograms and not counters:
+            if metrics.enabled:
+                self.console.print("Nothing recorded yet, run a command first.", style="yellow")
+            else:
+                self.console.print("Metrics are off, [white]'stats on'[/white] starts collecting (or set JOBSCRAPER_METRICS=1).", style="yellow")
+            return
+
+        from rich import box
+        from rich.table import Table
+
+        def labels_text(labels: Dict[str, str]) -> str:
+            return " ".join(f"{label}={value}" for label, value in labels.items())
+
+        table = Table(title="Timings", box=box.ROUNDED, show_header=True, header_style="bold cyan")
+        table.add_column("Metric", style="bold white")
+        table.add_column("Labels")
+        for column in ("Count", "Total (s)", "Mean (ms)", "p50 (ms)", "p95 (ms)", "Max (ms)"):
+            table.add_column(column, justify="right")
+        for name, labels, histogram in histograms:
+            mean = histogram.sum / histogram.count if histogram.count else 0.0
+            table.add_row(
+                name, labels_text(labels), str(histogram.count), f"{histogram.sum:.3f}", f"{mean * 1000:.2f}",
+                f"{histogram.quantile(0.5) * 1000:.2f}", f"{histogram.quantile(0.95) * 1000:.2f}", f"{histogram.max * 1000:.2f}"
+            )
+        self.console.print(table)
+
+        table = Table(title="Counters", box=box.ROUNDED, show_header=True, header_style="bold cyan")
+        table.add_column("Metric", style="bold white")
+        table.add_column("Labels")
+        table.add_column("Value", justify="right")
+        for name, labels, value in counters:
+            table.add_row(name, labels_text(labels), f"{value:g}")
+        self.console.print(table)
+
+        # rates over the time actually spent in the stage
+        rates = [
+            ("ingest", metrics.counter_total("db_rows_inserted_total"), "rows", metrics.histogram_sum("db_call_seconds", call="scrape_internships")),
+            ("scrape", metrics.counter_total("scrape_pages_total"), "pages", metrics.histogram_sum("scrape_seconds")),
+            ("scrape", metrics.counter_total("scrape_jobs_seen_total"), "jobs", metrics.histogram_sum("scrape_seconds")),
+        ]
+        for stage, amount, unit, seconds in rates:
+            if seconds:
+                self.console.print(f"{stage}: {amount:g} {unit} in {seconds:.2f}s ([white]{amount / seconds:,.0f} {unit}/sec[/white])", style="green")
+
+    def handle_report(self, args: List[str]) -> None:
+        from rich import box
+        from rich.table import Table
+
+        if len(args) > 1 or (args and (not args[0].isdigit() or int(args[0]) < 1)):
+            self.console.print("Usage: [white]'report'[/white] or [white]'report <weeks>'[/white] (e.g. [white]'report 12'[/white])", style="red")
+            return
+        weeks = int(args[0]) if args else self.report_weeks
+
+        report, error = db_handler.get_status_report(weeks)
+        if error is not None:
+            self.console.print(f"Error: {error}")
+            return
+        if not report["reached"]:
+            self.console.print("No saved jobs yet, [white]'move <id>'[/white] some first.", style="yellow")
+            return
+
+        current, reached = dict(report["current"]), dict(report["reached"])
+        statuses = [status for status in self.funnel if status in reached or status in current]
+        saved = reached.get("fetched") or sum(reached.values())
+
+        table = Table(title="Application funnel", box=box.ROUNDED, show_header=True, header_style="bold cyan")
+        table.add_column("Status", style="bold white")
+        for column in ("Now", "Reached", "% of saved"):
+            table.add_column(column, justify="right")
+        for status in statuses:
+            style = self.statuscolor[status]
+            table.add_row(f"[{style}]{status}[/{style}]", str(current.get(status, 0)), str(reached.get(status, 0)),
+                          f"{reached.get(status, 0) / saved * 100:.1f}")
+        self.console.print(table)
+
+        weekly: Dict[str, Dict[str, int]] = {}
+        for week, status, jobs in report["weekly"]:
+            weekly.setdefault(week, {})[status] = jobs
+        table = Table(title=f"Jobs entering each status per week (last {weeks} weeks)", box=box.ROUNDED, show_header=True, header_style="bold cyan")
+        table.add_column("Week of", justify="center")
+        for status in statuses:
+            table.add_column(status, justify="right")
+        for week, counts in weekly.items():
+            table.add_row(week, *(str(counts.get(status, "")) for status in statuses))
+        self.console.print(table)
+        if not weekly:
+            self.console.print(f"No status changes in the last {weeks} weeks.", style="yellow")
+
+        stages = {status: row for status, *row in report["stages"]}
+        table = Table(title="Time in status", box=box.ROUNDED, show_header=True, header_style="bold cyan")
+        table.add_column("Status", style="bold white")
+        for column in ("Jobs moved on", "Avg days", "Max days"):
+            table.add_column(column, justify="right")
+        for status in statuses:
+            if status in stages:
+                jobs, average, maximum = stages[status]
+                table.add_row(status, str(jobs), f"{average:.1f}", f"{maximum:.1f}")
+        self.console.print(table)
+
     def handle_move(self, args: List[str]) -> None:
-        if not args or len(args) > 1:
-            self.console.print(f"Usage: [white]'move <id>'[/white]", style="red")
+        usage = "Usage: [white]'move <id(s)>'[/white] (e.g. [white]'move 4-60,72'[/white]) or [white]'move where <filter>'[/white]"
+        if not args:
+            self.console.print(usage, style="red")
             return
 
-        target = args[0]
+        selected = self._parse_selection(args, db_handler.temptablename, usage)
+        if selected is None:
+            return
 
-        check, new_id = db_handler.move_internship(target)
+        target = " ".join(args)
+        moved, matched, new_id = db_handler.move_internships(*selected)
 
-        if check:
+        if moved == 1 and matched == 1:
             self.console.print(f"Successfully moved internship with ID [white]{target}[/white] to main database, it's new ID is [white]{new_id}[/white]", style="green b")
+        elif moved:
+            self.console.print(f"Successfully moved {moved} of {matched} internship(s) to main database ({matched - moved} already stored).", style="green b")
         else:
-            self.console.print(f"Internship with ID [white]{target}[/white] was not able to get moved (either the id is wrond or it already is stored in main database).", style="red b")
+            self.console.print(f"Internship(s) [white]{target}[/white] were not able to get moved (either the id is wrong or it already is stored in main database).", style="red b")
         return
     
     
     def handle_clear(self, args: List[str]) -> None:
         try:
             if db_handler.clear_temp_database():
-                self.console.print("Cleared the temporary table", style="green")
+                self.console.print("Cleared the temporary table (see [white]'list archive'[/white])", style="green")
             else:
                 self.console.print("Something went wrong, try again later", style="red b")
             return
@@ -304,21 +755,243 @@ class InternshipCLI:
             print(f"Error: {e}")
             return
         
+    def handle_expire(self, args: List[str]) -> None:
+        if len(args) > 1 or (args and not args[0].isdigit()):
+            self.console.print("Usage: [white]'expire <days>'[/white] (e.g. [white]'expire 14'[/white])", style="red")
+            return
+        days = int(args[0]) if args else db_handler.EXPIRE_AFTER_DAYS
+
+        expired = db_handler.expire_internships(days)
+        if expired < 0:
+            self.console.print("Something went wrong, try again later", style="red b")
+        elif expired:
+            self.console.print(f"Moved {expired} scraped internship(s) unseen for {days} days to the archive.", style="green")
+        else:
+            self.console.print(f"No scraped internship was unseen for {days} days.", style="yellow")
+
+    def handle_export(self, args: List[str]) -> None:
+        from modules import exchange
+        from rich.markup import escape
+        usage = "Usage: [white]'export <./main> <file>'[/white] or [white]'export all <directory> <csv/jsonl/parquet>'[/white]"
+        if len(args) not in (2, 3) or (len(args) == 3) != (args[0] == "all"):
+            self.console.print(usage, style="red")
+            return
+        try:
+            jobs = exchange_jobs(args[0], args[1], args[2] if len(args) == 3 else None)
+            exported = exchange.export_tables(jobs)
+        except (exchange.ExchangeError, OSError) as e:
+            self.console.print(f"Error: {escape(str(e))}", style="red")
+            self.console.print(usage, style="red")
+            return
+        for table, rows in exported.items():
+            self.console.print(f"Exported {rows} row(s) of {table} to [white]{escape(str(jobs[table]))}[/white]", style="green")
+
+    def handle_import(self, args: List[str]) -> None:
+        from modules import exchange
+        from rich.markup import escape
+        usage = "Usage: [white]'import <./main> <file>'[/white] or [white]'import all <directory>'[/white]"
+        if len(args) != 2:
+            self.console.print(usage, style="red")
+            return
+        try:
+            jobs = exchange_jobs(args[0], args[1], existing=True)
+            imported = exchange.import_tables(jobs)
+        except (exchange.ExchangeError, OSError) as e:
+            self.console.print(f"Error: {escape(str(e))}", style="red")
+            self.console.print(usage, style="red")
+            return
+        for table, (inserted, skipped) in imported.items():
+            self.console.print(
+                f"Imported {inserted} row(s) from [white]{escape(str(jobs[table]))}[/white] into {table} ({skipped} skipped, already stored or incomplete)",
+                style="green"
+            )
+
     def handle_delete(self, args:List[str]) -> None:
+        usage = "Usage: [white]'delete <id(s)>'[/white] (e.g. [white]'delete 4-60,72'[/white]) or [white]'delete where <filter>'[/white]"
         try:
-            if not args or len(args) > 1:
-                self.console.print(f"Usage: [white]'delete <id>'[/white]", style="red")
+            if not args:
+                self.console.print(usage, style="red")
+                return
 
-            targetID = args[0]
+            selected = self._parse_selection(args, db_handler.tablename, usage)
+            if selected is None:
+                return
 
-            if db_handler.delete_internship(targetID):
-                self.console.print(f"Deleted internship with ID {targetID} from main database.", style="green")
+            target = " ".join(args)
+            deleted = db_handler.delete_internships(*selected)
+            if deleted > 0:
+                self.console.print(f"Deleted {deleted} internship(s) ({target}) from main database.", style="green")
+            elif deleted == 0:
+                self.console.print(f"No internship matched {target}.", style="yellow")
             else:
-                self.console.print(f"Something went wrong with deleting internship with id {targetID}, try again later", style="red b")
+                self.console.print(f"Something went wrong with deleting internship(s) {target}, try again later", style="red b")
             return
         except Exception as e:
             print(f"Error: {e}")
             return
+
+# 'export' / 'import' targets -> tables
+EXCHANGE_TARGETS: Dict[str, str] = {".": db_handler.temptablename, "main": db_handler.tablename}
+
+
+def exchange_jobs(target: str, path: str, file_type: str | None = None, existing: bool = False) -> Dict[str, Path]:
+    # {table: file} of 'export/import <./main/all> <path>', "all" means one file per table in the directory <path>,
+    # named after the table: <table>.<file_type> for exports, whichever exported file exists for imports (<existing>)
+    from modules import exchange
+    if target in EXCHANGE_TARGETS:
+        return {EXCHANGE_TARGETS[target]: Path(path)}
+    if target != "all":
+        raise exchange.ExchangeError(f"unknown table '{target}' (use ., main or all)")
+
+    directory = Path(path)
+    if existing:
+        jobs = {}
+        for table in EXCHANGE_TARGETS.values():
+            found = [directory / f"{table}{suffix}" for suffix in exchange.FORMATS if (directory / f"{table}{suffix}").is_file()]
+            if found:
+                jobs[table] = found[0]
+        if not jobs:
+            raise exchange.ExchangeError(f"no exported tables found in '{directory}'")
+        return jobs
+
+    jobs = {table: directory / f"{table}.{file_type}" for table in EXCHANGE_TARGETS.values()}
+    for file in jobs.values():
+        exchange.file_format(file)
+    directory.mkdir(parents=True, exist_ok=True)
+    return jobs
+
+
+# Headless (non-interactive) interface for cron jobs and scheduled runs, prints plain lines instead of Rich tables
+HIGH_WATER_MARK_KEY = "last_date_posted"
+INTERVAL_UNITS: Dict[str, int] = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_interval(value: str) -> int:
+    # "30s", "15m", "2h", "1d" -> seconds, plain numbers are minutes
+    try:
+        if value[-1].isdigit():
+            seconds = int(float(value) * 60)
+        else:
+            seconds = int(float(value[:-1]) * INTERVAL_UNITS[value[-1].lower()])
+    except (ValueError, KeyError, IndexError):
+        raise argparse.ArgumentTypeError(f"invalid interval '{value}' (use e.g. 30s, 15m, 2h, 1d)")
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError("interval has to be positive")
+    return seconds
+
+
+def _high_water_mark_key(profile_name: str) -> str:
+    # the settings based "default" profile keeps the plain key
+    if profile_name == "default":
+        return HIGH_WATER_MARK_KEY
+    return f"{HIGH_WATER_MARK_KEY}:{profile_name}"
+
+
+def run_scrape_cycle(full: bool = False, details: bool = False) -> None:
+    # One incremental scrape of every profile, only postings published since
+    # the profile's last high-water mark are fetched
+    from modules import scraper
+    profiles = db_handler.get_search_profiles()
+    since: Dict[str, str] = {}
+    if not full:
+        for profile in profiles:
+            mark = db_handler.get_state(_high_water_mark_key(profile[0]))
+            if mark is not None:
+                since[profile[0]] = mark
+
+    found_jobs, new_jobs, stats = scraper.scrape_profiles(profiles, since=since, details=details, full=full)
+
+    for name, newest_date in stats["newest_dates"].items():
+        if newest_date is not None and (name not in since or newest_date > since[name]):
+            db_handler.set_state(_high_water_mark_key(name), newest_date)
+
+    print(
+        f"{datetime.now():%Y-%m-%d %H:%M:%S} found={found_jobs} new={new_jobs} profiles={stats['profiles']} "
+        f"overlaps={stats['overlaps']} details={stats['details']} seen_again={stats['seen_again']} expired={stats['expired']} "
+        f"full={int(stats['full'])} "
+        f"pages={stats['pages']} seconds={stats['seconds']:.2f}",
+        flush=True
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Internship Tracker (starts the interactive shell without arguments)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scrape_parser = subparsers.add_parser("scrape", help="scrape once and exit")
+    scrape_parser.add_argument("--once", action="store_true", help="run a single cycle (default)")
+    scrape_parser.add_argument("--full", action="store_true", help="ignore the high-water mark of the last run and read every result page (archives postings no longer listed)")
+    scrape_parser.add_argument("--details", action="store_true", help="also fetch the full posting of every new job")
+    scrape_parser.add_argument("--metrics", metavar="FILE", help="collect metrics and write them to FILE (JSON for *.json, Prometheus text otherwise)")
+
+    watch_parser = subparsers.add_parser("watch", help="scrape repeatedly on an interval")
+    watch_parser.add_argument("--interval", type=parse_interval, default=parse_interval("15m"), help="e.g. 30s, 15m, 2h (default 15m)")
+    watch_parser.add_argument("--details", action="store_true", help="also fetch the full posting of every new job")
+    watch_parser.add_argument("--metrics", metavar="FILE", help="collect metrics and rewrite FILE after every cycle")
+
+    export_parser = subparsers.add_parser("export", help="write scraped (.) / saved (main) jobs to a .csv, .jsonl or .parquet file")
+    export_parser.add_argument("table", choices=(*EXCHANGE_TARGETS, "all"))
+    export_parser.add_argument("path", help="file, or the directory for all (one file per table)")
+    export_parser.add_argument("--format", default="csv", choices=("csv", "jsonl", "parquet"), help="file type for all (default csv)")
+
+    import_parser = subparsers.add_parser("import", help="load exported jobs, already stored links are skipped")
+    import_parser.add_argument("table", choices=(*EXCHANGE_TARGETS, "all"))
+    import_parser.add_argument("path", help="exported file, or the directory of an 'export all'")
+    for subparser in (export_parser, import_parser):
+        subparser.set_defaults(metrics=None)
+    return parser
+
+
+def run_exchange(command: str, target: str, path: str, file_type: str | None = None) -> None:
+    from modules import exchange
+    if command == "export":
+        for table, rows in exchange.export_tables(exchange_jobs(target, path, file_type)).items():
+            print(f"exported table={table} rows={rows}", flush=True)
+    else:
+        for table, (inserted, skipped) in exchange.import_tables(exchange_jobs(target, path, existing=True)).items():
+            print(f"imported table={table} inserted={inserted} skipped={skipped}", flush=True)
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        app = InternshipCLI()
+        app.start()
+        return 0
+
+    args = build_parser().parse_args(argv)
+    if args.metrics:
+        metrics.enable()
+    db_handler.table_create()
+    try:
+        if args.command in ("export", "import"):
+            run_exchange(args.command, args.table, args.path, getattr(args, "format", None))
+            return 0
+
+        if args.command == "scrape":
+            try:
+                run_scrape_cycle(args.full, args.details)
+            finally:
+                if args.metrics:
+                    metrics.dump(args.metrics)
+            return 0
+
+        while True:
+            try:
+                run_scrape_cycle(details=args.details)
+            except Exception as e:
+                # a failed cycle should not stop the watcher, the next one may work again
+                print(f"Error: {e}", file=sys.stderr, flush=True)
+            if args.metrics:
+                metrics.dump(args.metrics)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db_handler.close_connections()
+
+
 if __name__ == "__main__":
-    app = InternshipCLI()
-    app.start()
\ No newline at end of file
+    sys.exit(main(sys.argv[1:]))
\ No newline at end of file
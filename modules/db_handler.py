@@ -1,7 +1,14 @@
 from pathlib import Path
+import inspect
+import math
 import sqlite3
-from typing import List
-from datetime import datetime
+import threading
+from typing import Dict, Iterable, List
+from datetime import datetime, timedelta
+
+from . import dedup
+from . import metrics
+from .models import JobPosting, TrackedJob
 
 
 # Path to main directory 
@@ -13,10 +20,281 @@ DB_PATH = BASE_DIR / "internships.db"
 tablename = "internships"
 temptablename = "scraped_internships"
 settings_table_name = "settings"
+# Columns returned for rows of the main / temporary table, in the field order of TrackedJob / JobPosting
+table_select = "id, company_name, position, location, link, date_posted, status, last_update"
+temp_select = "id, company_name, position, location, link, date_posted"
+# Columns covered by the full-text search ('search <query>')
+search_columns = ("company_name", "position", "location")
+state_table_name = "scrape_state"
+profiles_table_name = "search_profiles"
+posting_profiles_table_name = "posting_profiles"
+# Scraped postings that expired (or were cleared), kept for history and deduplication
+archive_table_name = "scraped_internships_archive"
+# Append-only log of the status changes of saved jobs and the aggregates kept from it by triggers:
+# jobs entering a status per week (week = date of its Monday) and the time spent in each status
+status_events_table_name = "status_events"
+status_weekly_table_name = "status_weekly"
+status_durations_table_name = "status_durations"
+# R*Tree over the workplace coordinates of the scraped postings (one point box per posting, rowid = posting id),
+# kept by triggers, answers the radius search ('near') without an API request
+geo_table_name = "scraped_internships_geo"
+EARTH_RADIUS_KM = 6371.0
+
+# Scraped postings no scrape has seen for this many days are moved to the archive
+EXPIRE_AFTER_DAYS = 30
+# Stored in PRAGMA user_version by table_create(), bump it with every change of the tables/indexes below
+# so existing databases run the DDL (and migrations) once more
+SCHEMA_VERSION = 4
+# Free pages (4KB each) above which expire_internships() gives the space back to the file system
+VACUUM_FREE_PAGES = 1024
+
+# Pragmas applied to every pooled connection, "durable" is used for normal commands,
+# "bulk-ingest" trades some crash safety for faster large writes (scraping)
+PRAGMA_PROFILES: Dict[str, Dict[str, str | int]] = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,        # ~8MB
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    "bulk-ingest": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,       # ~64MB
+        "mmap_size": 268435456,     # 256MB
+        "temp_store": "MEMORY",
+    },
+}
+DEFAULT_PROFILE = "durable"
+
+# One connection per thread, reused across all commands of a session
+_local = threading.local()
+_connections: List[sqlite3.Connection] = []
+_connections_lock = threading.Lock()
+# Bumped by close_connections() so other threads notice their connection is gone
+_generation = 0
+
+
+def _apply_profile(conn: sqlite3.Connection, profile: str) -> None:
+    for pragma, value in PRAGMA_PROFILES[profile].items():
+        conn.execute(f"PRAGMA {pragma}={value}")
+
+
+def get_connection(profile: str | None = None) -> sqlite3.Connection:
+    # Returns the connection of the current thread, opens it on first use
+    # (or if DB_PATH was changed) and switches its pragma profile if needed
+    profile = profile or DEFAULT_PROFILE
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != DB_PATH or _local.generation != _generation:
+        if conn is not None:
+            _close(conn)
+        # check_same_thread=False only so close_connections() can close it from the main thread
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        metrics.inc("db_connections_opened_total")
+        _local.conn = conn
+        _local.path = DB_PATH
+        _local.generation = _generation
+        _local.profile = None
+        with _connections_lock:
+            _connections.append(conn)
+
+    if _local.profile != profile:
+        _apply_profile(conn, profile)
+        _local.profile = profile
+    return conn
+
+
+def _close(conn: sqlite3.Connection) -> None:
+    with _connections_lock:
+        if conn in _connections:
+            _connections.remove(conn)
+    conn.close()
+
+
+def close_thread_connection() -> None:
+    # Closes the connection of the current thread, for worker threads that are done with the database
+    # (it would stay open in the pool otherwise). The next get_connection() of the thread opens a new one
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        _close(conn)
+        _local.conn = None
+
+
+def close_connections() -> None:
+    # Closes every pooled connection (all threads), called when the CLI exits
+    global _generation
+    with _connections_lock:
+        _generation += 1
+        connections = list(_connections)
+        _connections.clear()
+    for conn in connections:
+        conn.close()
+
+
+def _select_columns(table: str) -> str:
+    return table_select if table == tablename else temp_select
+
+
+def _row_factory(table: str):
+    # cursor.row_factory building the model of <table> (TrackedJob / JobPosting) from its select columns
+    model = TrackedJob if table == tablename else JobPosting
+    return lambda cursor, row: model.from_row(row)
+
+
+def table_columns(table: str) -> tuple:
+    # Columns that can be filtered on ('move where ..', 'update .. where ..')
+    return tuple(_select_columns(table).split(", "))
+
+
+def _ensure_columns(cur: sqlite3.Cursor, table: str, columns: Dict[str, str]) -> List[str]:
+    # Adds columns that are missing in databases created by older versions, returns the added ones
+    existing = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+    added = []
+    for column, definition in columns.items():
+        if column not in existing:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            added.append(column)
+    return added
+
+
+def _create_search_index(cur: sqlite3.Cursor, table: str) -> None:
+    # External-content FTS5 table over the text columns of <table> (no second copy of the text)
+    fts_table = f"{table}_fts"
+    columns = ", ".join(search_columns)
+    old_columns = ", ".join(f"old.{column}" for column in search_columns)
+    new_columns = ", ".join(f"new.{column}" for column in search_columns)
+
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (fts_table,))
+    exists = cur.fetchone() is not None
+
+    cur.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({columns}, content='{table}', content_rowid='id',"
+        " tokenize='unicode61 remove_diacritics 2')"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN"
+        f" INSERT INTO {fts_table}(rowid, {columns}) VALUES (new.id, {new_columns}); END"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN"
+        f" INSERT INTO {fts_table}({fts_table}, rowid, {columns}) VALUES ('delete', old.id, {old_columns}); END"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {columns} ON {table} BEGIN"
+        f" INSERT INTO {fts_table}({fts_table}, rowid, {columns}) VALUES ('delete', old.id, {old_columns});"
+        f" INSERT INTO {fts_table}(rowid, {columns}) VALUES (new.id, {new_columns}); END"
+    )
+
+    if not exists:
+        # rows stored before the index existed
+        cur.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def _create_status_log(cur: sqlite3.Cursor) -> None:
+    # Every status a saved job gets (on insert and on every change) is appended to the event log by triggers,
+    # so it is written in the same transaction as the change itself, whichever statement made it.
+    # Inserting an event updates the weekly counts and closes the time the job spent in its previous status
+    now = "strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime')"
+
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (status_events_table_name,))
+    exists = cur.fetchone() is not None
+
+    cur.execute(
+        f"CREATE TABLE IF NOT EXISTS {status_events_table_name} (id INTEGER NOT NULL PRIMARY KEY, job_id INTEGER NOT NULL,"
+        " link TEXT NOT NULL, from_status TEXT, to_status TEXT NOT NULL, changed_at TEXT NOT NULL)"
+    )
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{status_events_table_name}_job_id ON {status_events_table_name}(job_id, id)")
+    cur.execute(
+        f"CREATE TABLE IF NOT EXISTS {status_weekly_table_name} (week TEXT NOT NULL, status TEXT NOT NULL,"
+        " jobs INTEGER NOT NULL, PRIMARY KEY(week, status)) WITHOUT ROWID"
+    )
+    cur.execute(
+        f"CREATE TABLE IF NOT EXISTS {status_durations_table_name} (status TEXT NOT NULL PRIMARY KEY,"
+        " jobs INTEGER NOT NULL, days REAL NOT NULL, max_days REAL NOT NULL)"
+    )
+
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {status_events_table_name}_aggregate AFTER INSERT ON {status_events_table_name} BEGIN"
+        f" INSERT INTO {status_weekly_table_name}(week, status, jobs)"
+        "  VALUES (date(new.changed_at, 'weekday 0', '-6 days'), new.to_status, 1)"
+        "  ON CONFLICT(week, status) DO UPDATE SET jobs = jobs + 1;"
+        f" INSERT INTO {status_durations_table_name}(status, jobs, days, max_days)"
+        "  SELECT * FROM (SELECT new.from_status, 1, julianday(new.changed_at) - julianday(changed_at) AS days,"
+        "   julianday(new.changed_at) - julianday(changed_at)"
+        f"   FROM {status_events_table_name} WHERE job_id = new.job_id AND id < new.id ORDER BY id DESC LIMIT 1)"
+        "  WHERE new.from_status IS NOT NULL"
+        "  ON CONFLICT(status) DO UPDATE SET jobs = jobs + 1, days = days + excluded.days, max_days = max(max_days, excluded.days);"
+        " END"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {tablename}_status_insert AFTER INSERT ON {tablename} BEGIN"
+        f" INSERT INTO {status_events_table_name}(job_id, link, from_status, to_status, changed_at)"
+        f" VALUES (new.id, new.link, NULL, new.status, {now}); END"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {tablename}_status_update AFTER UPDATE OF status ON {tablename}"
+        f" WHEN old.status IS NOT new.status BEGIN"
+        f" INSERT INTO {status_events_table_name}(job_id, link, from_status, to_status, changed_at)"
+        f" VALUES (new.id, new.link, old.status, new.status, {now}); END"
+    )
+
+    if not exists:
+        # jobs saved before the log existed start with their current status at their last update
+        cur.execute(
+            f"INSERT INTO {status_events_table_name}(job_id, link, from_status, to_status, changed_at)"
+            f" SELECT id, link, NULL, status, COALESCE(last_update, date('now', 'localtime')) FROM {tablename} ORDER BY id"
+        )
+
+
+def _create_geo_index(cur: sqlite3.Cursor) -> None:
+    # Postings without coordinates (external ones, rows scraped before they were stored) are left out
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (geo_table_name,))
+    exists = cur.fetchone() is not None
+
+    cur.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {geo_table_name} USING rtree(id, min_lat, max_lat, min_lon, max_lon)")
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {temptablename}_geo_insert AFTER INSERT ON {temptablename}"
+        " WHEN new.lat IS NOT NULL AND new.lon IS NOT NULL BEGIN"
+        f" INSERT INTO {geo_table_name} VALUES (new.id, new.lat, new.lat, new.lon, new.lon); END"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {temptablename}_geo_delete AFTER DELETE ON {temptablename}"
+        " WHEN old.lat IS NOT NULL AND old.lon IS NOT NULL BEGIN"
+        f" DELETE FROM {geo_table_name} WHERE id = old.id; END"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {temptablename}_geo_update AFTER UPDATE OF lat, lon ON {temptablename} BEGIN"
+        f" DELETE FROM {geo_table_name} WHERE id = old.id;"
+        f" INSERT INTO {geo_table_name} SELECT new.id, new.lat, new.lat, new.lon, new.lon"
+        " WHERE new.lat IS NOT NULL AND new.lon IS NOT NULL; END"
+    )
+
+    if not exists:
+        # rows stored before the index existed
+        cur.execute(
+            f"INSERT INTO {geo_table_name} SELECT id, lat, lat, lon, lon FROM {temptablename}"
+            " WHERE lat IS NOT NULL AND lon IS NOT NULL"
+        )
+
+
+def _enable_incremental_vacuum(conn: sqlite3.Connection) -> None:
+    # auto_vacuum can only be switched for an existing database by rebuilding it once (VACUUM),
+    # afterwards deleted pages can be released in small steps with PRAGMA incremental_vacuum
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("VACUUM")
+
 
 def table_create() -> None:
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
+            # current schema (or one of a newer version), nothing to create or migrate
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
+            _enable_incremental_vacuum(conn)
             cur = conn.cursor()
             command = "CREATE TABLE IF NOT EXISTS"
             table_columns = (
@@ -35,7 +313,21 @@ def table_create() -> None:
                 "position TEXT NOT NULL",
                 "location TEXT NOT NULL",
                 "link TEXT NOT NULL UNIQUE",
-                "date_posted TEXT NOT NULL",  
+                "date_posted TEXT NOT NULL",
+                "refnr TEXT",
+                "fingerprint TEXT",
+                "first_seen TEXT",
+                "last_seen TEXT",
+                "plz TEXT",
+                "lat REAL",
+                "lon REAL"
+            )
+            archive_columns = (
+                *temp_columns[1:4],
+                "link TEXT NOT NULL",
+                *temp_columns[5:],
+                "archived_at TEXT NOT NULL",
+                "reason TEXT NOT NULL"
             )
             user_settings = (
                 "search TEXT",
@@ -47,6 +339,7 @@ def table_create() -> None:
             default_settings = ("Softwareentwickler", "Kiel", "25", "20")
             fields = ",".join(table_columns)
             tempfields = ",".join(temp_columns)
+            archivefields = ",".join(("id INTEGER NOT NULL PRIMARY KEY", *archive_columns))
             settings = ",".join(user_settings)
 
             #creates if not exists main table where all user prefered jobs
@@ -54,37 +347,77 @@ def table_create() -> None:
 
             #creates if not exists temp table to show all scraped jobs
             cur.execute(f"{command} {temptablename} ({tempfields})")
+            if "fingerprint" in _ensure_columns(cur, temptablename, {"refnr": "TEXT", "fingerprint": "TEXT"}):
+                # rows scraped before deduplication existed get their content hash once
+                conn.create_function("fingerprint", 3, dedup.fingerprint, deterministic=True)
+                cur.execute(f"UPDATE {temptablename} SET fingerprint = fingerprint(company_name, position, location)")
+            if "last_seen" in _ensure_columns(cur, temptablename, {"first_seen": "TEXT", "last_seen": "TEXT"}):
+                # rows scraped before the lifecycle existed count as seen today, so they expire EXPIRE_AFTER_DAYS from now
+                cur.execute(
+                    f"UPDATE {temptablename} SET first_seen = COALESCE(first_seen, ?), last_seen = COALESCE(last_seen, ?)",
+                    (datetime.now().date(), datetime.now().date())
+                )
+            # workplace of the posting, rows scraped before have none (the API result is not stored)
+            _ensure_columns(cur, temptablename, {"plz": "TEXT", "lat": "REAL", "lon": "REAL"})
+
+            # expired / cleared scraped postings
+            cur.execute(f"{command} {archive_table_name} ({archivefields})")
+            _ensure_columns(cur, archive_table_name, {"plz": "TEXT", "lat": "REAL", "lon": "REAL"})
+
+            # indexes for sorting (date_posted) and filtering big tables
+            indexed_columns = {
+                tablename: ("date_posted", "status", "company_name", "location"),
+                temptablename: ("date_posted", "company_name", "location", "refnr", "fingerprint", "last_seen", "plz"),
+                archive_table_name: ("date_posted", "link", "archived_at", "plz")
+            }
+            for table, columns in indexed_columns.items():
+                for column in columns:
+                    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table}({column})")
+            # case-insensitive place lookups of the radius search (get_place_coordinates), covering so no row is read
+            for table in (temptablename, archive_table_name):
+                cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_location_nocase ON {table}(location COLLATE NOCASE, lat, lon)")
+
+            # full-text search index per job table, kept in sync by triggers
+            for table in (tablename, temptablename):
+                _create_search_index(cur, table)
+            # spatial index of the scraped postings for the radius search
+            _create_geo_index(cur)
+
+            # status history of saved jobs and its report aggregates, also kept by triggers
+            _create_status_log(cur)
 
             # create settings table + add default settings
             cur.execute(f"{command} {settings_table_name} ({settings})")
 
+            # saved searches, if there are none the single row of the settings table is used
+            cur.execute(
+                f"{command} {profiles_table_name} (id INTEGER NOT NULL PRIMARY KEY, name TEXT NOT NULL UNIQUE,"
+                " search TEXT, ort TEXT, umkreis INTEGER, search_amount INTEGER)"
+            )
+            # which profile(s) found which scraped posting
+            cur.execute(
+                f"{command} {posting_profiles_table_name} (link TEXT NOT NULL, profile TEXT NOT NULL,"
+                " PRIMARY KEY(link, profile)) WITHOUT ROWID"
+            )
+
+            # key/value table for bookkeeping of headless runs (e.g. high-water mark)
+            cur.execute(f"{command} {state_table_name} (key TEXT NOT NULL PRIMARY KEY, value TEXT)")
+
             cur.execute(f"SELECT count(*) FROM {settings_table_name}")
             count = cur.fetchone()[0]
             # print(count)
             if count == 0:
                 cur.execute(insert_default_settigs, default_settings)
 
+            cur.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
             return
     except sqlite3.OperationalError as e:
         print(f"Error:{e}")
         return
 
-def update_check() -> int:
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute(f"SELECT MAX(id) FROM {tablename}")
-            maxID = cur.fetchone()[0]
-            if maxID is not None:
-                return maxID
-            return 0
-    except sqlite3.Error as e:
-        print(f"Error:{e}")
-        return 0
-    
 def add_internship(company_name, position, location, link, date_posted) -> bool | int:
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
             sql = f"INSERT INTO {tablename}(company_name, position, location, link, date_posted, last_update) VALUES(?, ?, ?, ?, ?, ?)"
             data = (company_name, position, location, link, date_posted, datetime.now().date())
@@ -98,54 +431,285 @@ def add_internship(company_name, position, location, link, date_posted) -> bool
 
 def scrape_internship(company_name, position, location, link, date_posted) -> bool:
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
-            sql = f"INSERT INTO {temptablename}(company_name, position, location, link, date_posted) VALUES(?, ?, ?, ?, ?)"
-            data = (company_name, position, location, link, date_posted)
+            sql = (
+                f"INSERT INTO {temptablename}(company_name, position, location, link, date_posted, fingerprint, first_seen, last_seen)"
+                " VALUES(?, ?, ?, ?, ?, ?, ?, ?)"
+            )
+            today = datetime.now().date()
+            data = (company_name, position, location, link, date_posted, dedup.fingerprint(company_name, position, location), today, today)
             cur.execute(sql, data)
             return True
     except sqlite3.Error as e:
         return False
 
+def scrape_internships(postings: Iterable[JobPosting]) -> tuple[int, int]:
+    # Bulk version of scrape_internship, writes all postings in one transaction
+    # Returns (inserted, duplicates)
+    today = datetime.now().date()
+    rows = [(*posting.insert_values(), today, today) for posting in postings]
+    try:
+        with get_connection("bulk-ingest") as conn:
+            cur = conn.cursor()
+            sql = (
+                f"INSERT OR IGNORE INTO {temptablename}(company_name, position, location, link, date_posted, refnr, fingerprint,"
+                " plz, lat, lon, first_seen, last_seen) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            )
+            cur.executemany(sql, rows)
+            # rowcount, unlike total_changes, leaves out the rows written by the search / geo index triggers
+            inserted = cur.rowcount
+            metrics.inc("db_rows_inserted_total", inserted)
+            metrics.inc("db_rows_ignored_total", len(rows) - inserted)
+            return inserted, len(rows) - inserted
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+        return 0, 0
 
-def move_internship(targetID) -> bool | int:
+def get_dedup_keys() -> List[tuple]:
+    # (link, refnr, fingerprint) of every scraped posting, used to preload dedup.DedupIndex
+    # archived postings are included so expired or cleared postings do not come back as new
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
-            cur.execute(f"SELECT MAX(id) FROM {temptablename}")
-            maxtempID = cur.fetchone()[0]
+            cur.execute(
+                f"SELECT link, refnr, fingerprint FROM {temptablename}"
+                f" UNION ALL SELECT link, refnr, fingerprint FROM {archive_table_name}"
+            )
+            return cur.fetchall()
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+        return []
 
-            if maxtempID is not None:
-                if int(maxtempID) < int(targetID):
-                    return False, 0
-                
-                cur.execute(f'SELECT * FROM {temptablename} WHERE id =?', (targetID,))
 
-                id, company_name, position, location, link, date_posted = cur.fetchone()
-                # print(type(id))
-                check, id = add_internship(company_name, position, location, link, date_posted)
-                if check:
-                    return True, id
-            
-            return False, 0
-    except sqlite3.OperationalError as e:
+def move_internships(where: str, params: list) -> tuple[int, int, int]:
+    # Copies every scraped row matching <where> into the main table with one INSERT .. SELECT,
+    # rows whose link is already saved are skipped
+    # Returns (moved, matched, id of the last moved row)
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT COUNT(*) FROM {temptablename} WHERE {where}", params)
+            matched = cur.fetchone()[0]
+            cur.execute(
+                f"INSERT OR IGNORE INTO {tablename}(company_name, position, location, link, date_posted, last_update)"
+                f" SELECT company_name, position, location, link, date_posted, ? FROM {temptablename} WHERE {where} ORDER BY id",
+                (datetime.now().date(), *params)
+            )
+            moved = cur.rowcount
+            return moved, matched, cur.lastrowid if moved else 0
+    except sqlite3.Error as e:
         print(f"Error:{e}")
-        return False, 0
+        return 0, 0, 0
 
-def get_internships(table) -> List[tuple] | None:
+def get_internships(table) -> tuple[List[JobPosting | TrackedJob], Exception | None]:
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
-            cur.execute(f'SELECT * FROM {table} ORDER BY date_posted ASC')
-            rowData: List[tuple] = cur.fetchall()
+            cur.row_factory = _row_factory(table)
+            cur.execute(f'SELECT {_select_columns(table)} FROM {table} ORDER BY date_posted ASC')
+            rowData = cur.fetchall()
+
+            return rowData, None
+    except sqlite3.Error as e:
+        return [], e
+
+def get_internships_page(table, limit: int = 50, after: tuple | None = None) -> tuple[List[JobPosting | TrackedJob], tuple | None, Exception | None]:
+    # Keyset pagination over (date_posted, id), <after> is the cursor returned for the previous page
+    # Returns (rows, cursor of the next page or None if this was the last page, error)
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.row_factory = _row_factory(table)
+            if after is None:
+                cur.execute(f"SELECT {_select_columns(table)} FROM {table} ORDER BY date_posted ASC, id ASC LIMIT ?", (limit,))
+            else:
+                cur.execute(
+                    f"SELECT {_select_columns(table)} FROM {table} WHERE (date_posted, id) > (?, ?) ORDER BY date_posted ASC, id ASC LIMIT ?",
+                    (*after, limit)
+                )
+            rowData = cur.fetchall()
+
+            next_cursor = None
+            if len(rowData) == limit:
+                last_row = rowData[-1]
+                next_cursor = (last_row.date_posted, last_row.id)
+            return rowData, next_cursor, None
+    except sqlite3.Error as e:
+        return [], None, e
+
+def iter_internships(table, chunk_size: int = 500):
+    # Yields the whole table in chunks of <chunk_size> rows (same order as get_internships)
+    # so callers never hold more than one chunk in memory
+    cursor = None
+    while True:
+        rowData, cursor, error = get_internships_page(table, chunk_size, cursor)
+        if error is not None:
+            print(f"Error:{error}")
+            return
+        if rowData:
+            yield rowData
+        if cursor is None:
+            return
+
+def get_page_cursor(table, page: int, limit: int = 50) -> tuple | None:
+    # Cursor for jumping straight to <page>, only reads the date_posted index (no row data)
+    if page <= 1:
+        return None
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT date_posted, id FROM {table} ORDER BY date_posted ASC, id ASC LIMIT 1 OFFSET ?",
+                ((page - 1) * limit - 1,)
+            )
+            return cur.fetchone()
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+        return None
+
+def export_columns(table) -> tuple:
+    # Every column of <table> in table order (exports carry all of them, not only the listed ones)
+    with get_connection() as conn:
+        return tuple(row[1] for row in conn.execute(f"PRAGMA table_info({table})"))
+
+def iter_rows(table, chunk_size: int = 5000):
+    # Yields every row of <table> (all export_columns) as tuples in chunks of <chunk_size>, ordered by id.
+    # Errors are raised instead of printed, an export must not end up cut short without notice
+    columns = ", ".join(export_columns(table))
+    last_id = None
+    while True:
+        with get_connection() as conn:
+            if last_id is None:
+                rows = conn.execute(f"SELECT {columns} FROM {table} ORDER BY id LIMIT ?", (chunk_size,)).fetchall()
+            else:
+                rows = conn.execute(f"SELECT {columns} FROM {table} WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunk_size)).fetchall()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+def import_internships(table, rows: Iterable[Dict]) -> tuple[int, int]:
+    # Bulk insert of exported rows (dicts by column name, unknown columns are ignored) into the main or temp table.
+    # Ids are assigned anew, rows whose link is already stored or that miss a required column are skipped.
+    # Scraped rows without fingerprint / seen dates get them like freshly scraped ones
+    # Returns (inserted, skipped)
+    columns = [column for column in export_columns(table) if column != "id"]
+    today = datetime.now().date().isoformat()
+    values = []
+    for row in rows:
+        row = {column: row.get(column) for column in columns}
+        if table == temptablename:
+            row["fingerprint"] = row["fingerprint"] or dedup.fingerprint(row["company_name"], row["position"], row["location"])
+            row["first_seen"] = row["first_seen"] or today
+            row["last_seen"] = row["last_seen"] or today
+        elif table == tablename:
+            row["status"] = row["status"] or "fetched"
+        values.append(tuple(row[column] for column in columns))
+    try:
+        with get_connection("bulk-ingest") as conn:
+            cur = conn.cursor()
+            cur.executemany(
+                f"INSERT OR IGNORE INTO {table}({', '.join(columns)}) VALUES({', '.join('?' * len(columns))})",
+                values
+            )
+            inserted = cur.rowcount
+            metrics.inc("db_rows_imported_total", inserted, table=table)
+            return inserted, len(values) - inserted
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+        return 0, len(values)
+
+def _fts_query(query: str) -> str:
+    # Every word becomes a quoted prefix term ("pyth"* matches Python), all words have to match
+    terms = query.split()
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+def search_internships(query: str, limit: int = 50) -> tuple[List[tuple[str, JobPosting]], Exception | None]:
+    # Ranked full-text search over both job tables
+    # Returns (source, posting) pairs, best match first
+    match = _fts_query(query)
+    if not match:
+        return [], None
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            selects = []
+            for source, table in (("main", tablename), ("scraped", temptablename)):
+                # the best <limit> matches of each table are ranked (bm25) inside FTS5 before joining the rows
+                selects.append(
+                    f"SELECT '{source}', t.id, t.company_name, t.position, t.location, t.link, t.date_posted, m.score"
+                    f" FROM (SELECT rowid, rank AS score FROM {table}_fts WHERE {table}_fts MATCH ? ORDER BY rank LIMIT ?) m"
+                    f" JOIN {table} t ON t.id = m.rowid"
+                )
+            cur.execute(f"{' UNION ALL '.join(selects)} ORDER BY score LIMIT ?", (match, limit, match, limit, limit))
+            rowData = [(row[0], JobPosting.from_row(row[1:-1])) for row in cur.fetchall()]
+            return rowData, None
+    except sqlite3.Error as e:
+        return [], e
+
+def _distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    # Great-circle distance (haversine)
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def _bounding_box(lat: float, lon: float, km: float) -> tuple[float, float, float, float]:
+    # (min_lat, max_lat, min_lon, max_lon) of every point within <km> of lat/lon
+    angle = km / EARTH_RADIUS_KM
+    min_lat, max_lat = lat - math.degrees(angle), lat + math.degrees(angle)
+    if min_lat <= -90 or max_lat >= 90 or math.sin(angle) >= math.cos(math.radians(lat)):
+        # the circle contains a pole, every longitude
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+    delta = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+    return min_lat, max_lat, lon - delta, lon + delta
+
+def get_place_coordinates(place: str) -> tuple[float, float] | None:
+    # Center (average coordinates) of the stored postings, current and archived, in <place> (postal code or
+    # location name, case-insensitive), None if none of them has coordinates
+    column = "plz" if place.isdigit() else "location"
+    collate = "" if place.isdigit() else " COLLATE NOCASE"
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT AVG(lat), AVG(lon) FROM (SELECT lat, lon FROM {temptablename} WHERE {column} = ?{collate}"
+                f" UNION ALL SELECT lat, lon FROM {archive_table_name} WHERE {column} = ?{collate})"
+                " WHERE lat IS NOT NULL AND lon IS NOT NULL",
+                (place, place)
+            )
+            lat, lon = cur.fetchone()
+            return (lat, lon) if lat is not None else None
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+        return None
 
+def get_internships_near(lat: float, lon: float, km: float, limit: int = 50) -> tuple[List[tuple[float, JobPosting]], Exception | None]:
+    # Scraped postings within <km> of lat/lon, nearest first, as (distance in km, posting) pairs.
+    # The R*Tree narrows them down to the bounding box of the circle, only those are measured exactly
+    min_lat, max_lat, min_lon, max_lon = _bounding_box(lat, lon, km)
+    try:
+        with get_connection() as conn:
+            conn.create_function("distance_km", 4, _distance_km, deterministic=True)
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT * FROM (SELECT distance_km(?, ?, t.lat, t.lon) AS distance,"
+                f" {', '.join('t.' + column for column in table_columns(temptablename))}"
+                f" FROM {geo_table_name} g JOIN {temptablename} t ON t.id = g.id"
+                " WHERE g.max_lat >= ? AND g.min_lat <= ? AND g.max_lon >= ? AND g.min_lon <= ?)"
+                " WHERE distance <= ? ORDER BY distance, id LIMIT ?",
+                (lat, lon, min_lat, max_lat, min_lon, max_lon, km, limit)
+            )
+            rowData = [(row[0], JobPosting.from_row(row[1:])) for row in cur.fetchall()]
             return rowData, None
     except sqlite3.Error as e:
         return [], e
 
 def get_all_settings() -> List[tuple] | None:
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
             cur.execute(f'SELECT * FROM {settings_table_name}')
             rowData: tuple = cur.fetchone()
@@ -154,32 +718,62 @@ def get_all_settings() -> List[tuple] | None:
     except sqlite3.Error as e:
         return [], e
 
-def get_internship_by_id(targetID) -> tuple | None:
+def get_posting_refnr(table, targetID) -> str | None:
+    # refnr of a stored posting, taken from the link if the row has none (main table, old rows)
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
-            cur.execute(f'SELECT * FROM {tablename} WHERE id =?', (targetID,))
-            rowData: tuple = cur.fetchone()
+            if table == temptablename:
+                cur.execute(f"SELECT refnr, link FROM {temptablename} WHERE id=?", (targetID,))
+            else:
+                cur.execute(f"SELECT NULL, link FROM {tablename} WHERE id=?", (targetID,))
+            row = cur.fetchone()
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+        return None
+
+    if row is None:
+        return None
+    refnr, link = row
+    if refnr:
+        return refnr
+    if "/jobsuche/jobdetail/" in link:
+        return link.rsplit("/", 1)[-1]
+    return None
+
+def get_internship_by_id(targetID) -> tuple[List[TrackedJob | None], Exception | None]:
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.row_factory = _row_factory(tablename)
+            cur.execute(f'SELECT {table_select} FROM {tablename} WHERE id =?', (targetID,))
+            rowData = cur.fetchone()
             return [rowData], None
     except sqlite3.OperationalError as e:
         print(f"Error:{e}")
         return [], e
 
 def update_status(internship_id: int, new_status: str) -> None:
+    update_statuses(new_status, "id = ?", [internship_id])
+
+def update_statuses(new_status: str, where: str, params: list) -> int:
+    # Sets the status of every saved row matching <where> in one UPDATE, returns the number of updated rows
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
-            current_date = datetime.now() 
-            cur.execute(f"UPDATE {tablename} SET status=?, last_update=? WHERE id=?", (new_status, current_date.date(), internship_id))
-
-            return
-    except sqlite3.OperationalError as e:
+            current_date = datetime.now()
+            cur.execute(
+                f"UPDATE {tablename} SET status=?, last_update=? WHERE {where}",
+                (new_status, current_date.date(), *params)
+            )
+            return cur.rowcount
+    except sqlite3.Error as e:
         print(f"Error:{e}")
-        return
+        return 0
 
 def update_setting(setting: str, new_setting: str | int) -> bool:
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
             cur.execute(f"UPDATE {settings_table_name} SET {setting}=?", (new_setting,))
             return True
@@ -187,22 +781,218 @@ def update_setting(setting: str, new_setting: str | int) -> bool:
         print(f"Error:{e}")
         return False
 
-def clear_temp_database() -> bool:
+def get_search_profiles() -> List[tuple]:
+    # (name, search, ort, umkreis, search_amount) of every saved profile,
+    # falls back to the settings table as a single "default" profile
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT name, search, ort, umkreis, search_amount FROM {profiles_table_name} ORDER BY name")
+            rowData: List[tuple] = cur.fetchall()
+            if rowData:
+                return rowData
+            cur.execute(f"SELECT search, ort, umkreis, search_amount FROM {settings_table_name}")
+            return [("default", *cur.fetchone())]
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+        return []
+
+def get_profiles() -> tuple[List[tuple], Exception | None]:
+    # Saved profiles plus the number of scraped postings each of them matched (current and archived ones)
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT p.name, p.search, p.ort, p.umkreis, p.search_amount, COUNT(pp.link) FROM {profiles_table_name} p"
+                f" LEFT JOIN {posting_profiles_table_name} pp ON pp.profile = p.name GROUP BY p.id ORDER BY p.name"
+            )
+            return cur.fetchall(), None
+    except sqlite3.Error as e:
+        return [], e
+
+def add_profile(name: str, search: str, ort: str, umkreis: int, search_amount: int) -> bool:
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
-            cur.execute(f"DELETE FROM {temptablename}")
+            cur.execute(
+                f"INSERT INTO {profiles_table_name}(name, search, ort, umkreis, search_amount) VALUES(?, ?, ?, ?, ?)",
+                (name, search, ort, umkreis, search_amount)
+            )
             return True
-    except sqlite3.OperationalError as e:
+    except sqlite3.Error as e:
         print(f"Error:{e}")
         return False
 
-def delete_internship(targetID) -> bool:
+def delete_profile(name: str) -> bool:
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
-            cur.execute(f"DELETE FROM {tablename} WHERE id=?", (targetID,))
+            cur.execute(f"DELETE FROM {profiles_table_name} WHERE name=?", (name,))
+            if cur.rowcount == 0:
+                return False
+            cur.execute(f"DELETE FROM {posting_profiles_table_name} WHERE profile=?", (name,))
             return True
-    except sqlite3.OperationalError as e:
+    except sqlite3.Error as e:
         print(f"Error:{e}")
-        return False
\ No newline at end of file
+        return False
+
+def add_posting_profiles(matches) -> None:
+    # matches: (link, profile name) pairs
+    try:
+        with get_connection("bulk-ingest") as conn:
+            cur = conn.cursor()
+            cur.executemany(f"INSERT OR IGNORE INTO {posting_profiles_table_name}(link, profile) VALUES(?, ?)", matches)
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+
+def get_status_report(weeks: int = 8) -> tuple[Dict[str, List[tuple]], Exception | None]:
+    # Application funnel, read from the aggregates kept by the status triggers (never from the event log):
+    # "current" (status, jobs) now, "reached" (status, jobs that ever entered it),
+    # "weekly" (week, status, jobs) of the last <weeks> weeks, "stages" (status, jobs that left it, avg days, max days)
+    today = datetime.now().date()
+    since = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            report = {}
+            cur.execute(f"SELECT status, COUNT(*) FROM {tablename} GROUP BY status")
+            report["current"] = cur.fetchall()
+            cur.execute(f"SELECT status, SUM(jobs) FROM {status_weekly_table_name} GROUP BY status")
+            report["reached"] = cur.fetchall()
+            cur.execute(
+                f"SELECT week, status, jobs FROM {status_weekly_table_name} WHERE week >= ? ORDER BY week",
+                (since.isoformat(),)
+            )
+            report["weekly"] = cur.fetchall()
+            cur.execute(f"SELECT status, jobs, days / jobs, max_days FROM {status_durations_table_name}")
+            report["stages"] = cur.fetchall()
+            return report, None
+    except sqlite3.Error as e:
+        return {}, e
+
+def get_status_history(targetID) -> tuple[List[tuple], Exception | None]:
+    # (from_status, to_status, changed_at) of a saved job, oldest first
+    # (the link check leaves out events of a deleted job whose id was given out again)
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT from_status, to_status, changed_at FROM {status_events_table_name}"
+                f" WHERE job_id = ? AND link = (SELECT link FROM {tablename} WHERE id = ?) ORDER BY id",
+                (targetID, targetID)
+            )
+            return cur.fetchall(), None
+    except sqlite3.Error as e:
+        return [], e
+
+def get_state(key: str) -> str | None:
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT value FROM {state_table_name} WHERE key=?", (key,))
+            row = cur.fetchone()
+            return row[0] if row else None
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+        return None
+
+def set_state(key: str, value: str) -> bool:
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"INSERT INTO {state_table_name}(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                (key, value)
+            )
+            return True
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+        return False
+
+def clear_temp_database() -> bool:
+    # Empties the working table, the postings go to the archive so they stay known (and queryable)
+    return archive_internships("1", [], "cleared") >= 0
+
+def touch_internships(links: Iterable[str]) -> int:
+    # Marks already stored postings as seen today (a scrape found them again), returns the updated rows
+    today = datetime.now().date()
+    try:
+        with get_connection("bulk-ingest") as conn:
+            cur = conn.cursor()
+            cur.executemany(
+                f"UPDATE {temptablename} SET last_seen=? WHERE link=? AND last_seen IS NOT ?",
+                ((today, link, today) for link in links)
+            )
+            return cur.rowcount
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+        return 0
+
+def archive_internships(where: str, params: list, reason: str) -> int:
+    # Moves every scraped posting matching <where> into the archive table in one transaction
+    # Returns the number of archived rows (-1 on errors)
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"INSERT INTO {archive_table_name}(company_name, position, location, link, date_posted, refnr, fingerprint,"
+                " first_seen, last_seen, plz, lat, lon, archived_at, reason)"
+                " SELECT company_name, position, location, link, date_posted, refnr, fingerprint, first_seen, last_seen,"
+                " plz, lat, lon, ?, ?"
+                f" FROM {temptablename} WHERE {where}",
+                (datetime.now().date(), reason, *params)
+            )
+            archived = cur.rowcount
+            cur.execute(f"DELETE FROM {temptablename} WHERE {where}", params)
+            # posting_profiles is keyed by link, which the archive keeps, so the profile matches stay as they are
+            return archived
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+        return -1
+
+def expire_internships(days: int = EXPIRE_AFTER_DAYS) -> int:
+    # Archives scraped postings that no scrape has seen for <days> days and releases free pages
+    # once enough have piled up. Returns the number of expired rows (-1 on errors)
+    cutoff = datetime.now().date() - timedelta(days=days)
+    expired = archive_internships("last_seen < ?", [cutoff], "expired")
+    if expired > 0:
+        vacuum()
+    return expired
+
+def vacuum(min_free_pages: int = VACUUM_FREE_PAGES) -> int:
+    # Incremental vacuum: hands free pages back to the file system if there are at least <min_free_pages>
+    # (cheap compared to a full VACUUM, which rewrites the whole file). Returns the number of released pages
+    try:
+        conn = get_connection()
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_pages < min_free_pages:
+            return 0
+        # executescript() steps the pragma until it is done, execute() would only release a single page
+        conn.executescript("PRAGMA incremental_vacuum")
+        return free_pages - conn.execute("PRAGMA freelist_count").fetchone()[0]
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+        return 0
+
+def delete_internships(where: str, params: list) -> int:
+    # Deletes every saved row matching <where> in one statement, returns the number of deleted rows (-1 on errors)
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"DELETE FROM {tablename} WHERE {where}", params)
+            return cur.rowcount
+    except sqlite3.Error as e:
+        print(f"Error:{e}")
+        return -1
+
+
+def _instrument() -> None:
+    # Every public function of this module records its duration in the db_call_seconds histogram
+    # (labelled with its name), generators and the connection pool itself are left out
+    for name, func in list(globals().items()):
+        if (inspect.isfunction(func) and func.__module__ == __name__ and not name.startswith("_")
+                and not inspect.isgeneratorfunction(func) and name not in ("get_connection", "close_thread_connection", "close_connections")):
+            globals()[name] = metrics.timed("db_call_seconds", call=name)(func)
+
+
+_instrument()
@@ -0,0 +1,57 @@
+import hashlib
+import re
+from typing import Dict, Iterable, Iterator
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text: str | None) -> str:
+    # "  Muster GmbH & Co. KG" -> "muster gmbh co kg"
+    if not text:
+        return ""
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+def fingerprint(company_name: str | None, position: str | None, location: str | None) -> str:
+    # Content hash of a posting, the same job reposted under a new refnr / link keeps its fingerprint
+    key = "|".join((normalize(company_name), normalize(position), normalize(location)))
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+class DedupIndex:
+    # In-memory index of every known posting, keyed by link, refnr and content fingerprint.
+    # Each key points to the link of the posting that was seen first, so duplicates can be
+    # rejected (and mapped to the stored posting) without touching SQLite
+    def __init__(self, postings: Iterable[tuple] = ()):
+        # postings: (link, refnr, fingerprint) rows, e.g. db_handler.get_dedup_keys()
+        self._keys: Dict[str, str] = {}
+        for link, refnr, content_hash in postings:
+            self.add(link, refnr, content_hash)
+
+    @staticmethod
+    def _posting_keys(link: str, refnr: str | None, content_hash: str | None) -> Iterator[str]:
+        yield f"l:{link}"
+        if refnr:
+            yield f"r:{refnr}"
+        if content_hash:
+            yield f"f:{content_hash}"
+
+    def match(self, link: str, refnr: str | None, content_hash: str | None) -> str | None:
+        # Link of the already known posting this one duplicates, None if it is new
+        for key in self._posting_keys(link, refnr, content_hash):
+            known_link = self._keys.get(key)
+            if known_link is not None:
+                return known_link
+        return None
+
+    def add(self, link: str, refnr: str | None, content_hash: str | None) -> None:
+        for key in self._posting_keys(link, refnr, content_hash):
+            self._keys.setdefault(key, link)
+
+    def copy(self) -> "DedupIndex":
+        index = DedupIndex()
+        index._keys = self._keys.copy()
+        return index
+
+    def __len__(self) -> int:
+        return len(self._keys)
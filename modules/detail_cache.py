@@ -0,0 +1,136 @@
+import gzip
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from .db_handler import BASE_DIR
+
+CACHE_DIR = BASE_DIR / ".cache" / "details"
+# Entries older than this are fetched again
+DEFAULT_TTL = 7 * 24 * 3600
+# Least recently used entries are evicted once the compressed blobs exceed this size
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+
+class DetailCache:
+    # On-disk cache for posting details. Bodies are gzip compressed and stored under the
+    # sha256 of their content (identical bodies are kept once), a small SQLite index maps
+    # each key (refnr) to its blob plus the times needed for TTL and LRU eviction
+    def __init__(self, directory: Path | None = None, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory or CACHE_DIR)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._index = sqlite3.connect(self.directory / "index.db", check_same_thread=False)
+        with self._index:
+            self._index.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT NOT NULL PRIMARY KEY, digest TEXT NOT NULL,"
+                " size INTEGER NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._index.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed_at ON entries(accessed_at)")
+            self._index.execute("CREATE INDEX IF NOT EXISTS idx_entries_stored_at ON entries(stored_at)")
+            self._index.execute("CREATE INDEX IF NOT EXISTS idx_entries_digest ON entries(digest)")
+        # running total of size(), counted once here and kept up to date by put() / _delete()
+        self._size = self._index.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)"
+        ).fetchone()[0]
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.json.gz"
+
+    def get(self, key: str) -> Dict | None:
+        # Cached value of <key>, None if it is missing or expired
+        now = time.time()
+        with self._lock:
+            row = self._index.execute("SELECT digest, size, stored_at FROM entries WHERE key=?", (key,)).fetchone()
+            if row is None:
+                return None
+            digest, size, stored_at = row
+            if now - stored_at > self.ttl:
+                self._delete(key, digest, size)
+                return None
+            try:
+                data = gzip.decompress(self._blob_path(digest).read_bytes())
+            except OSError:
+                # blob went missing (e.g. cache folder cleaned up by hand)
+                self._delete(key, digest, size)
+                return None
+            with self._index:
+                self._index.execute("UPDATE entries SET accessed_at=? WHERE key=?", (now, key))
+        return json.loads(data)
+
+    def put(self, key: str, value: Dict) -> None:
+        data = json.dumps(value, ensure_ascii=False, sort_keys=True).encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        now = time.time()
+
+        with self._lock:
+            if not path.exists():
+                path.parent.mkdir(exist_ok=True)
+                tmp_path = path.with_suffix(".tmp")
+                tmp_path.write_bytes(gzip.compress(data))
+                tmp_path.replace(path)
+
+            row = self._index.execute("SELECT digest, size FROM entries WHERE key=?", (key,)).fetchone()
+            size = path.stat().st_size
+            if self._index.execute("SELECT 1 FROM entries WHERE digest=? LIMIT 1", (digest,)).fetchone() is None:
+                # blob not shared with another entry yet
+                self._size += size
+            with self._index:
+                self._index.execute(
+                    "INSERT INTO entries(key, digest, size, stored_at, accessed_at) VALUES(?, ?, ?, ?, ?)"
+                    " ON CONFLICT(key) DO UPDATE SET digest=excluded.digest, size=excluded.size,"
+                    " stored_at=excluded.stored_at, accessed_at=excluded.accessed_at",
+                    (key, digest, size, now, now)
+                )
+            if row is not None and row[0] != digest:
+                self._remove_blob_if_unused(*row)
+            self._evict()
+
+    def _delete(self, key: str, digest: str, size: int) -> None:
+        with self._index:
+            self._index.execute("DELETE FROM entries WHERE key=?", (key,))
+        self._remove_blob_if_unused(digest, size)
+
+    def _remove_blob_if_unused(self, digest: str, size: int) -> None:
+        if self._index.execute("SELECT 1 FROM entries WHERE digest=? LIMIT 1", (digest,)).fetchone() is None:
+            self._blob_path(digest).unlink(missing_ok=True)
+            self._size -= size
+
+    def _evict(self) -> None:
+        # Drops expired entries, then least recently used ones until the blobs fit into max_bytes
+        # (shared blobs are only counted once)
+        expired = self._index.execute(
+            "SELECT key, digest, size FROM entries WHERE stored_at < ?", (time.time() - self.ttl,)
+        ).fetchall()
+        for key, digest, size in expired:
+            self._delete(key, digest, size)
+
+        while self._size > self.max_bytes:
+            # oldest entries a few at a time (index on accessed_at), a put over the limit usually evicts one or two
+            oldest = self._index.execute(
+                "SELECT key, digest, size FROM entries ORDER BY accessed_at ASC LIMIT 16"
+            ).fetchall()
+            if not oldest:
+                return
+            for key, digest, size in oldest:
+                self._delete(key, digest, size)
+                if self._size <= self.max_bytes:
+                    return
+
+    def size(self) -> int:
+        # Bytes used by the compressed blobs (shared blobs counted once)
+        return self._size
+
+    def __len__(self) -> int:
+        return self._index.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        self._index.close()
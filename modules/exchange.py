@@ -0,0 +1,160 @@
+# Export / import of the job tables as CSV, JSONL or Parquet. Both directions stream the data in chunks,
+# neither the table nor the file is held in memory as a whole. Parquet needs pyarrow (optional, pip install pyarrow)
+import csv
+import itertools
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
+
+from . import db_handler
+
+# File suffix -> format
+FORMATS: Dict[str, str] = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+# Rows read from the database (export) or the file (import) at a time
+CHUNK_SIZE = 5000
+
+
+class ExchangeError(ValueError):
+    pass
+
+
+def file_format(path: str | Path) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix not in FORMATS:
+        raise ExchangeError(f"unknown file type '{suffix or path}' (use {', '.join(FORMATS)})")
+    return FORMATS[suffix]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ExchangeError("parquet files need pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def _write_csv(path: Path, columns: tuple, chunks: Iterable[List[tuple]]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+
+
+def _write_jsonl(path: Path, columns: tuple, chunks: Iterable[List[tuple]]) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        for rows in chunks:
+            file.write("".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows))
+
+
+def _write_parquet(path: Path, columns: tuple, chunks: Iterable[List[tuple]]) -> None:
+    # one row group per chunk, id is the only integer column
+    pa = _pyarrow()
+    schema = pa.schema([(column, pa.int64() if column == "id" else pa.string()) for column in columns])
+    with pa.parquet.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            arrays = [pa.array([None if value is None else str(value) for value in values], pa.string())
+                      if column != "id" else pa.array(values, pa.int64())
+                      for column, values in zip(columns, zip(*rows))]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+def _read_csv(path: Path) -> Iterator[Dict]:
+    with open(path, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            # CSV has no NULL, empty cells are read back as missing values
+            yield {column: value or None for column, value in row.items()}
+
+
+def _read_jsonl(path: Path) -> Iterator[Dict]:
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ExchangeError(f"{path.name} line {number}: {e}") from None
+            if not isinstance(row, dict):
+                raise ExchangeError(f"{path.name} line {number}: expected a JSON object, found {type(row).__name__}")
+            yield row
+
+
+def _read_parquet(path: Path) -> Iterator[Dict]:
+    pa = _pyarrow()
+    for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=CHUNK_SIZE):
+        yield from batch.to_pylist()
+
+
+WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}
+READERS = {"csv": _read_csv, "jsonl": _read_jsonl, "parquet": _read_parquet}
+
+
+def export_table(table: str, path: str | Path, chunk_size: int = CHUNK_SIZE) -> int:
+    # Writes every row of <table> to <path> (format by suffix), returns the number of rows.
+    # The file is written next to <path> first and only replaces it once complete
+    path = Path(path)
+    writer = WRITERS[file_format(path)]
+    try:
+        columns = db_handler.export_columns(table)
+    except sqlite3.Error as e:
+        raise ExchangeError(f"reading {table} failed: {e}") from None
+    count = 0
+
+    def chunks() -> Iterator[List[tuple]]:
+        nonlocal count
+        for rows in db_handler.iter_rows(table, chunk_size):
+            count += len(rows)
+            yield rows
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        writer(tmp_path, columns, chunks())
+        tmp_path.replace(path)
+    except sqlite3.Error as e:
+        raise ExchangeError(f"reading {table} failed: {e}") from None
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return count
+
+
+def import_table(table: str, path: str | Path, chunk_size: int = CHUNK_SIZE) -> tuple[int, int]:
+    # Loads an exported file into <table> in batches of <chunk_size> rows, returns (inserted, skipped)
+    path = Path(path)
+    reader = READERS[file_format(path)]
+    if not path.is_file():
+        raise ExchangeError(f"'{path}' does not exist")
+    inserted = skipped = 0
+    rows = reader(path)
+    while batch := list(itertools.islice(rows, chunk_size)):
+        added, ignored = db_handler.import_internships(table, batch)
+        inserted += added
+        skipped += ignored
+    return inserted, skipped
+
+
+def _run_parallel(function, jobs: Dict[str, Path]) -> Dict[str, object]:
+    # Runs function(table, path) for every table in its own thread (own pooled connection, closed when it is done),
+    # results by table, the first error is raised once all of them finished
+    def run(table: str, path: Path):
+        try:
+            return function(table, path)
+        finally:
+            db_handler.close_thread_connection()
+
+    with ThreadPoolExecutor(max_workers=len(jobs) or 1) as pool:
+        futures = {table: pool.submit(run, table, path) for table, path in jobs.items()}
+    return {table: future.result() for table, future in futures.items()}
+
+
+def export_tables(jobs: Dict[str, Path]) -> Dict[str, int]:
+    # {table: path}, all tables are exported at the same time
+    return _run_parallel(export_table, jobs)
+
+
+def import_tables(jobs: Dict[str, Path]) -> Dict[str, tuple[int, int]]:
+    # {table: path}, files are parsed at the same time, the batches of the tables take turns writing
+    return _run_parallel(import_table, jobs)
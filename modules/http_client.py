@@ -0,0 +1,159 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+from .ratelimit import RateLimiter
+
+# Status codes that are worth another try (throttled or temporary server errors)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# (connect, read) timeout in seconds
+DEFAULT_TIMEOUT = (5, 30)
+
+
+class HttpClient:
+    # Pooled keep-alive session with timeouts, retries with jittered exponential backoff
+    # and conditional requests (ETag / Last-Modified) for unchanged responses.
+    # Requests given a RateLimiter take one of its tokens per attempt and report every outcome to it
+    def __init__(
+        self,
+        headers: Dict[str, str] | None = None,
+        timeout: float | tuple = DEFAULT_TIMEOUT,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        pool_size: int = 10,
+        cache_size: int = 256
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache_size = cache_size
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        # url -> (validator headers, decoded json), least recently used first
+        self._cache: OrderedDict[str, tuple[Dict[str, str], Dict]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @staticmethod
+    def full_url(url: str, params: Dict | None = None) -> str:
+        # url with its query string, the key of cached responses
+        return requests.Request("GET", url, params=params).prepare().url
+
+    @staticmethod
+    def validators(response: requests.Response) -> Dict[str, str]:
+        # ETag / Last-Modified of a response, empty if it has none
+        return {name: response.headers[name] for name in ("ETag", "Last-Modified") if name in response.headers}
+
+    @staticmethod
+    def _conditional_headers(validators: Dict[str, str] | None) -> Dict[str, str]:
+        headers = {}
+        if validators:
+            if "ETag" in validators:
+                headers["If-None-Match"] = validators["ETag"]
+            if "Last-Modified" in validators:
+                headers["If-Modified-Since"] = validators["Last-Modified"]
+        return headers
+
+    def get_json(self, url: str, params: Dict | None = None, limiter: RateLimiter | None = None) -> Dict:
+        cache_key = self.full_url(url, params)
+        with self._cache_lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+
+        headers = self._conditional_headers(cached[0] if cached is not None else None)
+        response = self.request(url, params=params, headers=headers, limiter=limiter)
+        if response.status_code == 304 and cached is not None:
+            metrics.inc("http_not_modified_total")
+            return cached[1]
+
+        response.raise_for_status()
+        started = metrics.start()
+        data = response.json()
+        metrics.observe_since("json_decode_seconds", started)
+
+        validators = self.validators(response)
+        if validators:
+            with self._cache_lock:
+                self._cache[cache_key] = (validators, data)
+                self._cache.move_to_end(cache_key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return data
+
+    def stream(self, url: str, params: Dict | None = None, limiter: RateLimiter | None = None,
+               validators: Dict[str, str] | None = None) -> requests.Response:
+        # Response whose body is not read yet (iter_content), use it as a context manager so the
+        # connection goes back to the pool. Streamed bodies are not cached here, the caller keeps what it needs
+        # of them: with the <validators> of an earlier response the request is conditional and may answer 304
+        response = self.request(url, params=params, headers=self._conditional_headers(validators), stream=True, limiter=limiter)
+        if response.status_code == 304 and validators:
+            metrics.inc("http_not_modified_total")
+            return response
+        if not response.ok:
+            response.close()
+            response.raise_for_status()
+        return response
+
+    def request(self, url: str, params: Dict | None = None, headers: Dict | None = None, stream: bool = False,
+                limiter: RateLimiter | None = None) -> requests.Response:
+        # GET with retries on connection errors, timeouts and RETRY_STATUS responses,
+        # the last response (or exception) is passed on once all retries are used up
+        for attempt in range(self.max_retries + 1):
+            response = None
+            if limiter is not None:
+                limiter.wait()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.inc("http_errors_total", error=type(e).__name__)
+                if limiter is not None:
+                    limiter.record(None, time.perf_counter() - started)
+                if attempt == self.max_retries:
+                    raise
+            else:
+                # for streamed responses this is the time until the headers arrived
+                seconds = time.perf_counter() - started
+                metrics.observe("http_request_seconds", seconds)
+                metrics.inc("http_responses_total", status=response.status_code)
+                if limiter is not None:
+                    limiter.record(response.status_code, seconds, self._retry_after(response))
+                if response.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                    return response
+                response.close()
+
+            metrics.inc("http_retries_total")
+            time.sleep(self._backoff(attempt, response))
+
+    def _backoff(self, attempt: int, response: requests.Response | None) -> float:
+        # "Full jitter": random delay up to the exponential limit, Retry-After wins if it is longer
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = self._retry_after(response)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _retry_after(self, response: requests.Response | None) -> float | None:
+        # Retry-After in seconds (capped at backoff_max), the HTTP-date form is not used by the API
+        if response is None:
+            return None
+        retry_after = response.headers.get("Retry-After", "")
+        return min(float(retry_after), self.backoff_max) if retry_after.isdigit() else None
+
+    def close(self) -> None:
+        self.session.close()
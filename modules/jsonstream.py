@@ -0,0 +1,104 @@
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator
+
+_WHITESPACE = " \t\n\r"
+# Characters after which a decoded number was cut short ("3." + "25", "1e" + "5")
+_NUMBER_CONTINUES = ".eE+-"
+_decoder = json.JSONDecoder()
+
+
+class JsonArrayStream:
+    # Incremental parser for documents like {"maxErgebnisse": "..", "stellenangebote": [{..}, {..}], ..}
+    # The items of the <key> array are yielded one by one as soon as they are complete, so only the
+    # current chunk and item are held in memory. Every other top-level value ends up in .meta
+    def __init__(self, chunks: Iterable[bytes | str], key: str):
+        self.key = key
+        self.meta: Dict[str, Any] = {}
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self) -> Iterator[Any]:
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+
+        while True:
+            name = self._value()
+            self._expect(":")
+            if name == self.key and self._peek() == "[":
+                self._pos += 1
+                if self._peek() == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        yield self._value()
+                        if self._separator("]"):
+                            break
+            else:
+                self.meta[name] = self._value()
+
+            if self._separator("}"):
+                return
+
+    def _fill(self) -> bool:
+        # Appends the next chunk (dropping everything already consumed), False at the end of the input
+        if self._eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            text = self._utf8.decode(b"", final=True)
+        elif isinstance(chunk, bytes):
+            text = self._utf8.decode(chunk)
+        else:
+            text = chunk
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise ValueError("unexpected end of JSON document")
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"expected '{char}' but found '{found}' in JSON document")
+        self._pos += 1
+
+    def _separator(self, closing: str) -> bool:
+        # Consumes ',' (returns False) or the closing bracket (returns True)
+        found = self._peek()
+        self._pos += 1
+        if found == closing:
+            return True
+        if found != ",":
+            raise ValueError(f"expected ',' or '{closing}' but found '{found}' in JSON document")
+        return False
+
+    def _value(self) -> Any:
+        # Decodes one complete value, reading more chunks until it is complete
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # a number at the end of the buffer, or cut off right after its '.' / exponent, may continue in the next chunk
+            if (isinstance(value, (int, float)) and (end == len(self._buffer) or self._buffer[end] in _NUMBER_CONTINUES)
+                    and self._fill()):
+                continue
+            self._pos = end
+            return value
@@ -0,0 +1,199 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+# Collection is off unless switched on ('stats on', JOBSCRAPER_METRICS=1 or --metrics <file>),
+# every hook then returns after a single flag check
+enabled = os.environ.get("JOBSCRAPER_METRICS", "") not in ("", "0")
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (metric name, ((label, value), ..))
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        # counts[i] = observations <= BUCKETS[i] (not cumulative), the last slot is +Inf
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        # Upper bound of the bucket holding the <q> quantile (max for the +Inf bucket)
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+_lock = threading.Lock()
+_counters: Dict[Key, float] = {}
+_histograms: Dict[Key, Histogram] = {}
+_started_at = time.time()
+
+
+def _key(name: str, labels: Dict[str, str]) -> Key:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def enable(on: bool = True) -> None:
+    global enabled
+    enabled = on
+
+
+def reset() -> None:
+    global _started_at
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _started_at = time.time()
+
+
+def inc(name: str, amount: float = 1, **labels) -> None:
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+
+def start() -> float | None:
+    # Start of a timed block, None while disabled: started = metrics.start() ... metrics.observe_since(name, started)
+    return time.perf_counter() if enabled else None
+
+
+def observe_since(name: str, started: float | None, **labels) -> None:
+    if started is not None:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def timed(name: str, **labels) -> Callable:
+    # Decorator recording the duration of every call in the <name> histogram (not for generators)
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - started, **labels)
+        return wrapper
+    return decorate
+
+
+def counters() -> List[Tuple[str, Dict[str, str], float]]:
+    with _lock:
+        return [(name, dict(labels), value) for (name, labels), value in sorted(_counters.items())]
+
+
+def histograms() -> List[Tuple[str, Dict[str, str], Histogram]]:
+    with _lock:
+        return [(name, dict(labels), histogram) for (name, labels), histogram in sorted(_histograms.items())]
+
+
+def counter_total(name: str) -> float:
+    # Sum of a counter over all its labels
+    with _lock:
+        return sum(value for (counter, _), value in _counters.items() if counter == name)
+
+
+def histogram_sum(name: str, **labels) -> float:
+    # Seconds recorded by a histogram over all its labels (or only those matching <labels>)
+    wanted = set(_key(name, labels)[1])
+    with _lock:
+        return sum(histogram.sum for (hist, hist_labels), histogram in _histograms.items()
+                   if hist == name and wanted.issubset(hist_labels))
+
+
+def snapshot() -> Dict:
+    return {
+        "started_at": _started_at,
+        "uptime_seconds": time.time() - _started_at,
+        "counters": [{"name": name, "labels": labels, "value": value} for name, labels, value in counters()],
+        "histograms": [
+            {
+                "name": name, "labels": labels, "count": h.count, "sum": h.sum, "max": h.max,
+                "buckets": {str(bound): count for bound, count in zip((*BUCKETS, "+Inf"), _cumulative(h.counts))}
+            }
+            for name, labels, h in histograms()
+        ]
+    }
+
+
+def _cumulative(counts: List[int]) -> Iterator[int]:
+    total = 0
+    for count in counts:
+        total += count
+        yield total
+
+
+def _labels_text(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for label, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{label}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def prometheus_text() -> str:
+    # Prometheus text exposition format (counters and histograms)
+    lines = []
+    typed = set()
+    for name, labels, value in counters():
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_labels_text(labels)} {value:g}")
+    for name, labels, h in histograms():
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        for bound, count in zip((*BUCKETS, "+Inf"), _cumulative(h.counts)):
+            lines.append(f"{name}_bucket{_labels_text({**labels, 'le': str(bound)})} {count}")
+        lines.append(f"{name}_sum{_labels_text(labels)} {h.sum:.6f}")
+        lines.append(f"{name}_count{_labels_text(labels)} {h.count}")
+    return "\n".join(lines) + "\n"
+
+
+def dump(path: str | Path) -> None:
+    # Writes the metrics to <path>, as JSON for *.json files and in the Prometheus text format otherwise
+    path = Path(path)
+    text = json.dumps(snapshot(), indent=2) if path.suffix == ".json" else prometheus_text()
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text)
+    tmp_path.replace(path)
@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from typing import Dict, Sequence
+
+from .dedup import fingerprint
+
+
+@dataclass(slots=True)
+class JobPosting:
+    # A scraped posting (row of the scraped_internships table), id is None until it is stored.
+    # Slotted so the millions of postings a large scrape may pass around stay small
+    id: int | None
+    company_name: str | None
+    position: str | None
+    location: str | None
+    link: str
+    date_posted: str | None
+    refnr: str | None = None
+    fingerprint: str | None = None
+    # postal code and coordinates of the workplace, used by the radius search ('near')
+    plz: str | None = None
+    lat: float | None = None
+    lon: float | None = None
+
+    @classmethod
+    def from_api(cls, job: Dict) -> "JobPosting":
+        # Posting of a jobsuche result page ('stellenangebote' entry)
+        ref_nr = job.get('refnr', None)
+        company_name = job.get('arbeitgeber', None)
+        position = job.get('titel', job.get('beruf', None))
+        workplace = job.get('arbeitsort', {})
+        location = workplace.get('ort', None)
+        coordinates = workplace.get('koordinaten') or {}
+        link = job.get('externeUrl', f"https://www.arbeitsagentur.de/jobsuche/jobdetail/{ref_nr}")
+        date_posted = job.get('aktuelleVeroeffentlichungsdatum', None)
+        return cls(None, company_name, position, location, link, date_posted, ref_nr,
+                   fingerprint(company_name, position, location),
+                   workplace.get('plz', None), coordinates.get('lat', None), coordinates.get('lon', None))
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> "JobPosting":
+        # tuple / sqlite3.Row in the column order of db_handler.temp_select
+        return cls(*row)
+
+    def insert_values(self) -> tuple:
+        # Values for INSERT INTO scraped_internships(company_name, position, location, link, date_posted, refnr, fingerprint,
+        # plz, lat, lon)
+        return (self.company_name, self.position, self.location, self.link, self.date_posted, self.refnr, self.fingerprint,
+                self.plz, self.lat, self.lon)
+
+
+@dataclass(slots=True)
+class TrackedJob:
+    # A saved job of the main table, whose status is tracked
+    id: int
+    company_name: str
+    position: str
+    location: str
+    link: str
+    date_posted: str
+    status: str
+    last_update: str
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> "TrackedJob":
+        # tuple / sqlite3.Row in the column order of db_handler.table_select
+        return cls(*row)
@@ -0,0 +1,150 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from . import metrics
+
+# Responses telling the client to slow down, connection errors / timeouts (status None) count as well
+THROTTLE_STATUS = {429, 503}
+
+
+class RateLimiter:
+    # Client-side limits of one API endpoint, shared by every request of the process to it:
+    # - token bucket: at most <rate> requests/sec on average, bursts of up to <burst> (rate None = unlimited).
+    #   429/503 responses cut the rate by <decrease>, every healthy response raises it by <rate_step> up to <rate> again
+    # - AIMD concurrency: requests in flight start at <concurrency>, grow by one per window of healthy responses
+    #   up to <max_concurrency> and are cut by <decrease> on 429/503, errors or latency spikes
+    # - a throttled response pauses the bucket for its Retry-After (or <cooldown>), so all requests back off together
+    # Cuts happen at most once per <cooldown>, the answers to requests sent before a cut don't cut again.
+    # After a cut the limits grow back only to just below where they were cut for <probe_after> seconds,
+    # every probe above costs the pause of a throttled response
+    # A latency spike is a response slower than <max_latency> or <spike_factor> times the average of the healthy ones
+    def __init__(
+        self,
+        name: str,
+        rate: float | None = None,
+        burst: int = 1,
+        rate_step: float | None = None,
+        min_rate: float = 0.5,
+        concurrency: int = 4,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+        decrease: float = 0.5,
+        cooldown: float = 1.0,
+        max_latency: float | None = None,
+        spike_factor: float = 4.0,
+        probe_after: float = 30.0
+    ):
+        self.name = name
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        # default: back from a cut to half the rate in ~50 healthy responses
+        self.rate_step = rate_step if rate_step is not None else (rate or 0) / 100
+        self.min_rate = min_rate
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.max_latency = max_latency
+        self.spike_factor = spike_factor
+        self.probe_after = probe_after
+
+        self.limit = float(min(max(concurrency, min_concurrency), max_concurrency))
+        self.in_flight = 0
+        self._slots = threading.Condition()
+
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._bucket_lock = threading.Lock()
+
+        # average latency of healthy responses (exponentially weighted), None until the first one
+        self.latency: float | None = None
+        self._last_decrease = 0.0
+        # limits (concurrency, rate) the increase stops at until _probe_at
+        self._ceiling: tuple[float, float | None] = (max_concurrency, rate)
+        self._probe_at = 0.0
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        # One request in flight (including reading its body), waits while the concurrency limit is reached
+        started = metrics.start()
+        with self._slots:
+            while self.in_flight >= int(self.limit):
+                self._slots.wait()
+            self.in_flight += 1
+        metrics.observe_since("ratelimit_slot_wait_seconds", started, endpoint=self.name)
+        try:
+            yield
+        finally:
+            with self._slots:
+                self.in_flight -= 1
+                self._slots.notify()
+
+    def wait(self) -> None:
+        # Takes a token for one attempt, sleeps until one is available (and a throttling pause is over)
+        if self.rate is None and not self._paused_until:
+            return
+        started = metrics.start()
+        while True:
+            with self._bucket_lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self.rate is None:
+                    break
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+                    self._refilled = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+        metrics.observe_since("ratelimit_wait_seconds", started, endpoint=self.name)
+
+    def record(self, status: int | None, seconds: float, retry_after: float | None = None) -> None:
+        # Feedback of one attempt: <status> None for connection errors and timeouts, <seconds> until the response (headers)
+        if status in THROTTLE_STATUS or status is None:
+            reason = "throttled" if status is not None else "error"
+        elif self.max_latency is not None and seconds > self.max_latency:
+            reason = "latency"
+        elif self.latency is not None and seconds > self.spike_factor * self.latency:
+            reason = "latency"
+        else:
+            reason = None
+
+        if status is not None and status not in THROTTLE_STATUS:
+            self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+
+        now = time.monotonic()
+        if reason is None:
+            max_limit, max_rate = self._ceiling if now < self._probe_at else (self.max_concurrency, self.max_rate)
+            with self._slots:
+                # additive increase: +1 after <limit> healthy responses
+                self.limit = max(self.limit, min(max_limit, self.limit + 1 / self.limit))
+                self._slots.notify()
+            if self.rate is not None and self.rate < max_rate:
+                with self._bucket_lock:
+                    self.rate = min(max_rate, self.rate + self.rate_step)
+            return
+
+        with self._slots:
+            if now - self._last_decrease < self.cooldown:
+                cut = False
+            else:
+                cut = True
+                self._last_decrease = now
+                self._ceiling = (max(self.min_concurrency, int(self.limit) - 1), self.rate and self.rate * 0.9)
+                self._probe_at = now + self.probe_after
+                self.limit = max(self.min_concurrency, self.limit * self.decrease)
+        if reason == "throttled":
+            with self._bucket_lock:
+                self._paused_until = max(self._paused_until, now + (retry_after if retry_after is not None else self.cooldown))
+                self._tokens = 0.0
+                if cut and self.rate is not None:
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+        if cut:
+            metrics.inc("ratelimit_backoffs_total", endpoint=self.name, reason=reason)
@@ -1,38 +1,457 @@
-import requests
+import base64
+import math
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List
+
 from . import db_handler
+from . import metrics
+from .dedup import DedupIndex
+from .detail_cache import DetailCache
+from .http_client import HttpClient
+from .jsonstream import JsonArrayStream
+from .models import JobPosting
+from .ratelimit import RateLimiter
+
+API_URL = "https://rest.arbeitsagentur.de/jobboerse/jobsuche-service/pc/v4/jobs"
+API_HEADERS = {"X-API-Key": "jobboerse-jobsuche"}
+# Full posting, the refnr is passed base64 encoded
+DETAIL_URL = "https://rest.arbeitsagentur.de/jobboerse/jobsuche-service/pc/v4/jobdetails/{refnr}"
+
+# The jobsuche API does not return more than 100 postings per page
+PAGE_SIZE = 100
+# Upper bound of pages that are requested at the same time by one search
+MAX_WORKERS = 4
+# Upper bound of searches (profiles) that are scraped at the same time
+MAX_PARALLEL_PROFILES = 4
+# Global cap of requests in flight, shared by all searches of the process
+MAX_CONCURRENT_REQUESTS = 8
+# Client-side limits per API endpoint (see ratelimit.RateLimiter), shared by all searches of the process:
+# requests/sec and burst of the token bucket, requests in flight at the start and at most (adapted to the
+# API's answers in between) and the response time (seconds) above which the API counts as overloaded.
+# The max_concurrency of all endpoints add up to MAX_CONCURRENT_REQUESTS
+RATE_LIMITS: Dict[str, Dict] = {
+    "jobs": {"rate": 10.0, "burst": 10, "concurrency": 4, "max_concurrency": 6, "max_latency": 10.0},
+    "jobdetails": {"rate": 5.0, "burst": 5, "concurrency": 2, "max_concurrency": 2, "max_latency": 10.0},
+}
+# (connect, read) timeout in seconds for every API request
+REQUEST_TIMEOUT = (5, 30)
+# Bytes read from a response body at a time while it is parsed
+STREAM_CHUNK_SIZE = 16 * 1024
+# Postings that may wait between two pipeline stages before the producing side is held back
+QUEUE_SIZE = 1000
+# Postings written per transaction while a scrape is still running
+INGEST_BATCH_SIZE = 500
+# Result pages whose parsed postings are kept (with the page's ETag / Last-Modified), a page the API
+# answers with 304 Not Modified is replayed from them instead of being downloaded and parsed again
+PAGE_CACHE_SIZE = 64
+# Days after which a scrape becomes a full pass: every result page up to the profile's amount is read
+# (no early stop at known postings, no high-water mark) so last_seen of every posting still online is
+# refreshed. Unseen postings are only expired after such a pass
+FULL_PASS_DAYS = 7
+FULL_PASS_KEY = "last_full_pass"
+
+# Shared by all scrapes of a session so connections (and TLS handshakes) get reused
+client = HttpClient(headers=API_HEADERS, timeout=REQUEST_TIMEOUT, pool_size=MAX_CONCURRENT_REQUESTS)
+limiters: Dict[str, RateLimiter] = {endpoint: RateLimiter(endpoint, **limits) for endpoint, limits in RATE_LIMITS.items()}
+# Detail cache of the process, opened on first use and shared by every scrape ('scrape details', 'watch --details')
+# and the 'details' command, like the client it lives as long as the process
+_detail_cache: DetailCache | None = None
+_detail_cache_lock = threading.Lock()
+# page url -> (validators, top-level fields, postings), least recently used first
+_page_cache: OrderedDict[str, tuple[Dict[str, str], Dict, List[JobPosting]]] = OrderedDict()
+_page_cache_lock = threading.Lock()
+# End of a _threaded() stream
+_DONE = object()
 
-def get_jobs_raw(search, ort, umkreis, amount):
-    url = "https://rest.arbeitsagentur.de/jobboerse/jobsuche-service/pc/v4/jobs"
-    headers = {"X-API-Key": "jobboerse-jobsuche"}
 
-    # Change SEARCH and LOCATION if you want to use this for your own job search
+class _Failed:
+    # Carries an exception of a producer thread over to the consumer
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _search_params(search, ort, umkreis, page, size, since_days=None) -> Dict:
+    # Change SEARCH and LOCATION in the settings if you want to use this for your own job search
     params = {
-        "was": f"{search}", # change "Entwickler" with what you want to search for
-        "wo": f"{ort}", # change "Kiel" with the region your prefered region
-        "umkreis": {umkreis},
-        "page": 1,
-        "size": {amount}, # <- this represents the maximum amount of jobs that can be extracted and stored in the database, try to increase it if you need new ones and can't find new ones.
-        "sortierung" : "datum"
+        "was": f"{search}",
+        "wo": f"{ort}",
+        "umkreis": umkreis,
+        "page": page,
+        "size": size,
+        "sortierung": "datum"
     }
+    if since_days is not None:
+        # only postings published within the last <since_days> days
+        params["veroeffentlichtseit"] = since_days
+    return params
+
+
+def _cached_page(key: str) -> tuple[Dict[str, str], Dict, List[JobPosting]] | None:
+    with _page_cache_lock:
+        cached = _page_cache.get(key)
+        if cached is not None:
+            _page_cache.move_to_end(key)
+        return cached
+
+
+def _cache_page(key: str, validators: Dict[str, str], meta: Dict, postings: List[JobPosting]) -> None:
+    with _page_cache_lock:
+        _page_cache[key] = (validators, meta, postings)
+        _page_cache.move_to_end(key)
+        while len(_page_cache) > PAGE_CACHE_SIZE:
+            _page_cache.popitem(last=False)
+
+
+def iter_page_jobs(search, ort, umkreis, page, size, url=API_URL, since_days=None, meta: Dict | None = None,
+                   validators: Dict[str, str] | None = None, response_info: Dict | None = None) -> Iterator[Dict]:
+    # Yields the raw postings of one result page while the body is still being read, so only the
+    # current chunk and posting are held in memory. The other top-level fields (maxErgebnisse, ..) go into <meta>
+    # With the <validators> of an earlier response the request is conditional, an unchanged page (304) yields
+    # nothing. <response_info> gets the status and the validators of the response
+    params = _search_params(search, ort, umkreis, page, size, since_days)
+    limiter = limiters["jobs"]
+    with limiter.slot(), client.stream(url, params=params, limiter=limiter, validators=validators) as response:
+        if response_info is not None:
+            response_info.update(status=response.status_code, validators=client.validators(response))
+        if response.status_code == 304:
+            return
+        stream = JsonArrayStream(response.iter_content(chunk_size=STREAM_CHUNK_SIZE), "stellenangebote")
+        # time spent reading and decoding the body, without the time the consumer holds on to a posting
+        timing = metrics.enabled
+        read_seconds = 0.0
+        jobs = iter(stream)
+        try:
+            while True:
+                if timing:
+                    started = time.perf_counter()
+                job = next(jobs, _DONE)
+                if timing:
+                    read_seconds += time.perf_counter() - started
+                if job is _DONE:
+                    return
+                yield job
+        finally:
+            if meta is not None:
+                meta.update(stream.meta)
+            if timing:
+                metrics.observe("scrape_read_seconds", read_seconds)
+
+
+def get_detail_cache() -> DetailCache:
+    global _detail_cache
+    with _detail_cache_lock:
+        if _detail_cache is None:
+            _detail_cache = DetailCache()
+        return _detail_cache
+
+
+def fetch_detail(ref_nr: str, cache: DetailCache, url=DETAIL_URL) -> Dict:
+    # Full posting of <ref_nr>, served from the on-disk cache while it is fresh
+    detail = cache.get(ref_nr)
+    metrics.inc("detail_cache_total", result="miss" if detail is None else "hit")
+    if detail is None:
+        encoded = base64.b64encode(ref_nr.encode()).decode()
+        limiter = limiters["jobdetails"]
+        with limiter.slot():
+            detail = client.get_json(url.format(refnr=encoded), limiter=limiter)
+        cache.put(ref_nr, detail)
+    return detail
+
+
+def enrich_details(ref_nrs, cache: DetailCache | None = None, url=DETAIL_URL, max_workers=MAX_WORKERS) -> Dict[str, Dict]:
+    # Fetches the details of every refnr with a bounded worker pool, failed fetches are skipped (and counted)
+    # Returns refnr -> detail
+    if cache is None:
+        cache = get_detail_cache()
+    ref_nrs = [ref_nr for ref_nr in dict.fromkeys(ref_nrs) if ref_nr]
+
+    def fetch(ref_nr: str):
+        try:
+            return ref_nr, fetch_detail(ref_nr, cache, url)
+        except Exception as e:
+            metrics.inc("detail_errors_total", error=type(e).__name__)
+            return ref_nr, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return {ref_nr: detail for ref_nr, detail in pool.map(fetch, ref_nrs) if detail is not None}
+
+
+def _threaded(produce: Callable[[Callable[[object], bool]], None], maxsize: int = QUEUE_SIZE) -> Iterator:
+    # Runs produce(put) in a background thread and yields everything it puts through a bounded queue,
+    # so a slow consumer holds the producer back instead of letting results pile up in memory.
+    # put() returns False once the consumer is gone (generator closed), the producer should stop then.
+    # Exceptions raised by the producer are raised again in the consumer
+    items: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run():
+        try:
+            produce(put)
+        except BaseException as error:
+            put(_Failed(error))
+        finally:
+            put(_DONE)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
 
-    response = requests.get(url, params=params, headers=headers)
+def iter_new_jobs(search, ort, umkreis, amount, url=API_URL, max_workers=MAX_WORKERS, since=None, index=None,
+                  progress: Dict | None = None, stop_at_known: bool = True) -> Iterator[JobPosting]:
+    # Yields every new posting of a search as soon as it is parsed, nothing is written to the database.
+    # Pages are streamed <max_workers> at a time until <amount> jobs are seen, the API runs out of pages
+    # or a page only contains postings that are already known (unless <stop_at_known> is False)
+    # <index> (DedupIndex, preloaded from the database if not given) rejects known postings by link, refnr or content
+    # <since> (YYYY-MM-DD) skips everything published before that day (incremental scraping)
+    # <progress> is filled with the jobs seen, pages fetched, the newest date_posted and the links of the
+    # already known postings that were seen again
+    amount = int(amount)
+    size = max(1, min(amount, PAGE_SIZE))
 
-    data = response.json()
-    raw_jobs = data.get('stellenangebote', [])
-    # print(raw_jobs)
+    if index is None:
+        index = DedupIndex(db_handler.get_dedup_keys())
+    since_days = None
+    if since is not None:
+        since_days = max(0, (date.today() - date.fromisoformat(since)).days)
+    if progress is None:
+        progress = {}
+    progress.update(jobs=0, pages=0, newest_date=None, known=set())
+    # the index and progress are shared by the page workers
+    lock = threading.Lock()
+
+    def page_postings(page: int, meta: Dict, timing: Dict[str, float] | None) -> Iterator[JobPosting]:
+        # Postings of one result page, parsed while it streams in or replayed from the page cache if the API
+        # reports the page as unchanged. Pages that were read to the end are cached for the next request
+        key = client.full_url(url, _search_params(search, ort, umkreis, page, size, since_days))
+        cached = _cached_page(key)
+        response: Dict = {}
+        postings: List[JobPosting] = []
+        with closing(iter_page_jobs(search, ort, umkreis, page, size, url, since_days, meta,
+                                    cached[0] if cached is not None else None, response)) as raw_jobs:
+            for job in raw_jobs:
+                if timing is not None:
+                    parse_started = time.perf_counter()
+                posting = JobPosting.from_api(job)
+                if timing is not None:
+                    timing["parse_seconds"] += time.perf_counter() - parse_started
+                postings.append(posting)
+                yield posting
+        if response["status"] == 304:
+            metrics.inc("scrape_pages_not_modified_total")
+            meta.update(cached[1])
+            yield from cached[2]
+        elif response["validators"]:
+            _cache_page(key, response["validators"], dict(meta), postings)
+
+    def stream_page(page: int, put: Callable[[object], bool], meta: Dict | None = None) -> bool:
+        # Returns True if paging should stop: the page was empty, only held already known (or too old)
+        # postings, <amount> is reached or the consumer is gone
+        with lock:
+            progress["pages"] += 1
+        empty = True
+        only_known = True
+        # per page tallies, handed to metrics once the page is done
+        started = metrics.start()
+        timing = {"parse_seconds": 0.0} if started is not None else None
+        seen = duplicates = too_old = 0
+        try:
+            with closing(page_postings(page, meta if meta is not None else {}, timing)) as postings:
+                for posting in postings:
+                    empty = False
+                    link, date_posted, ref_nr, content_hash = posting.link, posting.date_posted, posting.refnr, posting.fingerprint
+                    with lock:
+                        if progress["jobs"] >= amount:
+                            return True
+                        if since is not None and (date_posted is None or date_posted < since):
+                            too_old += 1
+                            continue
+
+                        seen += 1
+                        progress["jobs"] += 1
+                        if date_posted is not None and (progress["newest_date"] is None or date_posted > progress["newest_date"]):
+                            progress["newest_date"] = date_posted
+                        known_link = index.match(link, ref_nr, content_hash)
+                        if known_link is not None:
+                            progress["known"].add(known_link)
+                            duplicates += 1
+                            continue
+                        index.add(link, ref_nr, content_hash)
+
+                    only_known = False
+                    if not put(posting):
+                        return True
+            return empty or (only_known and stop_at_known) or progress["jobs"] >= amount
+        finally:
+            if started is not None:
+                metrics.observe_since("scrape_page_seconds", started)
+                metrics.observe("scrape_parse_seconds", timing["parse_seconds"])
+                metrics.inc("scrape_pages_total")
+                metrics.inc("scrape_jobs_seen_total", seen)
+                metrics.inc("scrape_duplicates_total", duplicates, stage="known")
+                metrics.inc("scrape_too_old_total", too_old)
+
+    def produce(put: Callable[[object], bool]) -> None:
+        meta: Dict = {}
+        stop = stream_page(1, put, meta)
+        last_page = math.ceil(amount / size)
+        max_results = meta.get('maxErgebnisse')
+        if max_results is not None:
+            last_page = min(last_page, math.ceil(int(max_results) / size))
+
+        next_page = 2
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while not stop and next_page <= last_page:
+                batch = range(next_page, min(next_page + max_workers, last_page + 1))
+                # the pages of a batch stream in parallel, paging stops after a batch with a stopping page
+                stop = any(list(pool.map(lambda page: stream_page(page, put), batch)))
+                next_page += len(batch)
+
+    yield from _threaded(produce)
+
+
+def collect_jobs(search, ort, umkreis, amount, url=API_URL, max_workers=MAX_WORKERS, since=None, index=None):
+    # iter_new_jobs collected into a list
+    # Returns (new postings, jobs seen, pages fetched, newest date_posted)
+    progress: Dict = {}
+    new_postings = list(iter_new_jobs(search, ort, umkreis, amount, url, max_workers, since, index, progress))
+    return new_postings, progress["jobs"], progress["pages"], progress["newest_date"]
+
+
+def persist_jobs(postings: Iterable[JobPosting], batch_size=INGEST_BATCH_SIZE) -> int:
+    # Writes the postings in transactions of <batch_size> while they are still coming in
+    # Returns the amount of postings that were new to the database
+    postings = iter(postings)
     total_new_jobs = 0
-    for job in raw_jobs:
-        ref_nr = job.get('refnr', None)
-        company_name = job.get('arbeitgeber', None)
-        position = job.get('titel', job.get('beruf', None))
-        location = job.get('arbeitsort', {}).get('ort', None)
-        link = job.get('externeUrl', f"https://www.arbeitsagentur.de/jobsuche/jobdetail/{ref_nr}")
-        date_posted = job.get('aktuelleVeroeffentlichungsdatum', None)
-        
-        check = db_handler.scrape_internship(company_name, position, location, link, date_posted)
-        if check:
-            total_new_jobs += 1
-
-    return len(raw_jobs), total_new_jobs
-    
-# get_jobs_raw()
\ No newline at end of file
+    while batch := list(islice(postings, batch_size)):
+        inserted, _ = db_handler.scrape_internships(batch)
+        total_new_jobs += inserted
+    return total_new_jobs
+
+
+def _build_stats(pages: int, jobs: int, start_time: float, **extra) -> Dict:
+    seconds = time.perf_counter() - start_time
+    stats = {
+        "pages": pages,
+        "seconds": seconds,
+        "pages_per_sec": pages / seconds if seconds else 0.0,
+        "jobs_per_sec": jobs / seconds if seconds else 0.0
+    }
+    stats.update(extra)
+    return stats
+
+
+@metrics.timed("scrape_seconds")
+def get_jobs_raw(search, ort, umkreis, amount, url=API_URL, max_workers=MAX_WORKERS, since=None):
+    # Scrapes a single search, fetch -> parse -> dedupe -> persist runs as one streaming pipeline
+    start_time = time.perf_counter()
+    progress: Dict = {}
+    total_new_jobs = persist_jobs(iter_new_jobs(search, ort, umkreis, amount, url, max_workers, since, progress=progress))
+    seen_again = db_handler.touch_internships(progress["known"])
+
+    stats = _build_stats(progress["pages"], progress["jobs"], start_time, newest_date=progress["newest_date"], seen_again=seen_again)
+    return progress["jobs"], total_new_jobs, stats
+
+
+@metrics.timed("scrape_seconds")
+def scrape_profiles(profiles: List[tuple], url=API_URL, since: Dict[str, str] | None = None, max_parallel=MAX_PARALLEL_PROFILES,
+                    details: bool = False, detail_url=DETAIL_URL, full: bool = False):
+    # Scrapes every (name, search, ort, umkreis, amount) profile concurrently, requests are throttled globally
+    # by the limiters of RATE_LIMITS. Postings found by several profiles are only stored once,
+    # the profiles that matched them are recorded in posting_profiles
+    # <details> also fetches the full posting of every new refnr into the detail cache
+    # <full> (or the last full pass being FULL_PASS_DAYS old) reads every result page, see FULL_PASS_DAYS
+    start_time = time.perf_counter()
+    if not full:
+        last_full_pass = db_handler.get_state(FULL_PASS_KEY)
+        full = last_full_pass is None or (date.today() - date.fromisoformat(last_full_pass)).days >= FULL_PASS_DAYS
+    since = {} if full else since or {}
+    # loaded once, every profile works on its own copy so overlaps are still seen by each of them
+    index = DedupIndex(db_handler.get_dedup_keys())
+    progress: Dict[str, Dict] = {profile[0]: {} for profile in profiles}
+
+    def produce(put: Callable[[object], bool]) -> None:
+        def run(profile: tuple) -> None:
+            name, search, ort, umkreis, amount = profile
+            with closing(iter_new_jobs(search, ort, umkreis, amount, url, since=since.get(name), index=index.copy(),
+                                       progress=progress[name], stop_at_known=not full)) as postings:
+                for posting in postings:
+                    if not put((name, posting)):
+                        return
+
+        with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+            list(pool.map(run, profiles))
+
+    # Overlaps between profiles are matched by the same rules (link, refnr, content) as known postings
+    merged = DedupIndex()
+    matches: List[tuple] = []
+    unique_ref_nrs: List[str | None] = []
+
+    def unique_postings() -> Iterator[JobPosting]:
+        for name, posting in _threaded(produce):
+            link, ref_nr, content_hash = posting.link, posting.refnr, posting.fingerprint
+            known_link = merged.match(link, ref_nr, content_hash)
+            if known_link is not None:
+                metrics.inc("scrape_duplicates_total", stage="profiles")
+            else:
+                merged.add(link, ref_nr, content_hash)
+                unique_ref_nrs.append(ref_nr)
+                yield posting
+                known_link = link
+            matches.append((known_link, name))
+
+    total_new_jobs = persist_jobs(unique_postings())
+    # already stored postings a profile found again are matches of that profile as well
+    db_handler.add_posting_profiles(
+        chain(matches, ((link, name) for name, p in progress.items() for link in p["known"]))
+    )
+    # lifecycle of the working table: postings found again stay, the ones unseen for too long go to the archive.
+    # Only a full pass has seen every posting that is still online, other scrapes stop at the first known page
+    seen_again = db_handler.touch_internships(set().union(*(p["known"] for p in progress.values())))
+    expired = 0
+    if full:
+        expired = db_handler.expire_internships()
+        db_handler.set_state(FULL_PASS_KEY, date.today().isoformat())
+
+    details_fetched = 0
+    if details:
+        details_fetched = len(enrich_details(unique_ref_nrs, url=detail_url))
+
+    total_jobs = sum(p["jobs"] for p in progress.values())
+    stats = _build_stats(
+        sum(p["pages"] for p in progress.values()), total_jobs, start_time,
+        profiles=len(profiles),
+        overlaps=len(matches) - len(unique_ref_nrs),
+        newest_dates={name: p["newest_date"] for name, p in progress.items()},
+        details=details_fetched,
+        seen_again=seen_again,
+        expired=max(expired, 0),
+        full=full
+    )
+    return total_jobs, total_new_jobs, stats
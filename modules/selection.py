@@ -0,0 +1,88 @@
+import re
+from typing import Dict, List, Tuple
+
+# Filter names usable in 'where' expressions -> table columns
+FILTER_COLUMNS: Dict[str, str] = {
+    "id": "id",
+    "company": "company_name",
+    "position": "position",
+    "location": "location",
+    "date": "date_posted",
+    "status": "status",
+    "updated": "last_update"
+}
+# '~' means "contains" (case-insensitive LIKE)
+FILTER_OPERATORS: Dict[str, str] = {"!=": "!=", "<=": "<=", ">=": ">=", "=": "=", "<": "<", ">": ">", "~": "LIKE"}
+
+_ID_SPEC = re.compile(r"^\d+(-\d+)?(,\d+(-\d+)?)*$")
+_CONDITION = re.compile(r"^(\w+)(!=|<=|>=|=|<|>|~)(.*)$", re.DOTALL)
+
+
+class SelectionError(ValueError):
+    pass
+
+
+def is_id_spec(text: str) -> bool:
+    return bool(_ID_SPEC.match(text))
+
+
+def parse_ids(spec: str) -> List[Tuple[int, int]]:
+    # "4-60,72" -> [(4, 60), (72, 72)]
+    if not is_id_spec(spec):
+        raise SelectionError(f"'{spec}' is not a valid id list (e.g. 4, 4-60 or 4-60,72)")
+    ranges = []
+    for part in spec.split(","):
+        start, _, end = part.partition("-")
+        start, end = int(start), int(end or start)
+        if start > end:
+            raise SelectionError(f"'{part}' is not a valid range")
+        ranges.append((start, end))
+    return ranges
+
+
+def parse_selection(args: List[str], columns: Tuple[str, ...]) -> Tuple[str, list]:
+    # Turns '4-60,72' or 'where company~foo and status=read' into a SQL WHERE clause + params,
+    # only filters whose column is in <columns> (the columns of the target table) are allowed
+    if not args:
+        raise SelectionError("nothing selected")
+
+    if len(args) == 1 and is_id_spec(args[0]):
+        conditions, params = [], []
+        single_ids = []
+        for start, end in parse_ids(args[0]):
+            if start == end:
+                single_ids.append(start)
+            else:
+                conditions.append("id BETWEEN ? AND ?")
+                params += [start, end]
+        if single_ids:
+            conditions.append(f"id IN ({', '.join('?' * len(single_ids))})")
+            params += single_ids
+        return " OR ".join(conditions), params
+
+    if args[0].lower() != "where" or len(args) == 1:
+        raise SelectionError("expected an id list (e.g. 4-60,72) or 'where <filter> [and <filter>..]'")
+
+    conditions, params = [], []
+    for token in args[1:]:
+        if token.lower() == "and":
+            continue
+        match = _CONDITION.match(token)
+        if match is None:
+            raise SelectionError(f"'{token}' is not a filter (e.g. company~foo, status=read, date>=2025-01-01)")
+        name, operator, value = match.groups()
+        column = FILTER_COLUMNS.get(name.lower())
+        if column is None or column not in columns:
+            raise SelectionError(f"unknown filter '{name}' (use {', '.join(n for n, c in FILTER_COLUMNS.items() if c in columns)})")
+
+        if operator == "~":
+            conditions.append(f"{column} LIKE ? ESCAPE '\\'")
+            escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        else:
+            conditions.append(f"{column} {FILTER_OPERATORS[operator]} ?")
+            params.append(int(value) if column == "id" and value.isdigit() else value)
+
+    if not conditions:
+        raise SelectionError("'where' needs at least one filter")
+    return " AND ".join(conditions), params